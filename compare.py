@@ -0,0 +1,221 @@
+import os
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import fitz  # PyMuPDF
+
+from rendering import render_pixmap
+
+# Resolution both documents are rendered at for diffing
+COMPARE_SCALE = 1.5
+# Largest bitmap a single diff renders; bigger sheets are diffed at a lower scale
+MAX_DIFF_PIXELS = 12_000_000
+# Per-channel difference ignored as anti-aliasing noise
+THRESHOLD = 32
+# Changed pixels are grouped into regions on a grid of this many pixels
+CELL = 16
+
+
+def pixmap_array(pix):
+    """View a pixmap's samples as a (height, width, channels) array without copying.
+
+    The array borrows the pixmap's memory, so the pixmap must outlive it.
+    """
+    rows = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.stride)
+    return rows[:, :pix.width * pix.n].reshape(pix.height, pix.width, pix.n)
+
+
+def diff_mask(a, b, threshold=THRESHOLD):
+    """Boolean mask of pixels that differ by more than threshold in any channel.
+
+    Arrays of different size are compared over the larger size, the missing
+    area counting as white paper.
+    """
+    height, width = max(a.shape[0], b.shape[0]), max(a.shape[1], b.shape[1])
+    if a.shape[:2] != (height, width):
+        a = np.pad(a, ((0, height - a.shape[0]), (0, width - a.shape[1]), (0, 0)), constant_values=255)
+    if b.shape[:2] != (height, width):
+        b = np.pad(b, ((0, height - b.shape[0]), (0, width - b.shape[1]), (0, 0)), constant_values=255)
+    # |a - b| without widening to a larger integer type
+    delta = np.maximum(a, b)
+    delta -= np.minimum(a, b)
+    return (delta > threshold).any(axis=2)
+
+
+def _runs(row):
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], row.view(np.int8), [0]))))
+    return edges.reshape(-1, 2)
+
+
+def changed_regions(mask, cell=CELL):
+    """Bounding boxes (x0, y0, x1, y1) in pixels of the connected changed areas in mask."""
+    height, width = mask.shape
+    rows, cols = -(-height // cell), -(-width // cell)
+    padded = np.zeros((rows * cell, cols * cell), dtype=bool)
+    padded[:height, :width] = mask
+    grid = padded.reshape(rows, cell, cols, cell).any(axis=(1, 3))
+
+    # Runs of changed cells per row, joined to the runs they touch in the row above
+    spans = []
+    parent = []
+
+    def find(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    previous = []
+    last_row = None
+    for row_number in np.flatnonzero(grid.any(axis=1)):
+        if last_row != row_number - 1:
+            previous = []
+        last_row = row_number
+        current = []
+        for start, end in _runs(grid[row_number]):
+            index = len(spans)
+            spans.append((row_number, start, end))
+            parent.append(index)
+            for other in previous:
+                if spans[other][1] <= end and start <= spans[other][2]:
+                    parent[find(other)] = find(index)
+            current.append(index)
+        previous = current
+
+    boxes = {}
+    for index, (row_number, start, end) in enumerate(spans):
+        box = boxes.setdefault(find(index), [start, row_number, end, row_number + 1])
+        box[0] = min(box[0], start)
+        box[1] = min(box[1], row_number)
+        box[2] = max(box[2], end)
+        box[3] = max(box[3], row_number + 1)
+    return sorted(
+        (int(x0 * cell), int(y0 * cell), int(min(x1 * cell, width)), int(min(y1 * cell, height)))
+        for x0, y0, x1, y1 in boxes.values()
+    )
+
+
+def diff_scale(rect, scale):
+    return min(scale, math.sqrt(MAX_DIFF_PIXELS / max(rect.width * rect.height, 1)))
+
+
+def diff_page(doc_a, doc_b, page_number, scale=COMPARE_SCALE):
+    """Diff one page of two documents; changed regions are returned in page coordinates."""
+    start = time.perf_counter()
+    pages = [doc.load_page(page_number) if page_number < len(doc) else None for doc in (doc_a, doc_b)]
+    present = [page for page in pages if page is not None]
+    if len(present) == 1:
+        # Only one document has this page, so all of it is a change
+        rect = present[0].rect
+        return {'page': page_number, 'changed': 1.0, 'regions': [tuple(rect)],
+                'missing': True, 'elapsed': time.perf_counter() - start}
+
+    scale = diff_scale(max((page.rect for page in pages), key=lambda r: r.width * r.height), scale)
+    pixmaps = [render_pixmap(page, scale) for page in pages]
+    mask = diff_mask(*(pixmap_array(pix) for pix in pixmaps))
+    del pixmaps
+    origin = pages[0].rect
+    regions = [
+        (origin.x0 + x0 / scale, origin.y0 + y0 / scale, origin.x0 + x1 / scale, origin.y0 + y1 / scale)
+        for x0, y0, x1, y1 in changed_regions(mask)
+    ]
+    return {
+        'page': page_number,
+        'changed': float(mask.mean()) if mask.size else 0.0,
+        'regions': regions,
+        'missing': False,
+        'elapsed': time.perf_counter() - start,
+    }
+
+
+_documents = None
+
+
+def _open_documents(path_a, path_b):
+    global _documents
+    _documents = (fitz.open(path_a), fitz.open(path_b))
+
+
+def _diff_job(page_number, scale):
+    return diff_page(_documents[0], _documents[1], page_number, scale)
+
+
+class CompareSession:
+    """Diffs every page of two documents on worker processes, nearest the viewed page first.
+
+    Each worker keeps both documents open and returns only the changed
+    regions, so no bitmaps cross the process boundary.
+    """
+
+    def __init__(self, path_a, path_b, scale=COMPARE_SCALE, workers=None):
+        self.paths = (path_a, path_b)
+        self.scale = scale
+        counts = []
+        for path in self.paths:
+            with fitz.open(path) as doc:
+                counts.append(len(doc))
+        self.page_counts = tuple(counts)
+        self.page_count = max(counts)
+        workers = workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+        self.ahead = workers * 2
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_open_documents, initargs=self.paths)
+        self.results = {}
+        self.pending = {}
+        self.cursor = 0
+        self.direction = 1
+
+    @property
+    def done(self):
+        return len(self.results) == self.page_count
+
+    def focus(self, page_number, direction=1):
+        """Diff pages from page_number onwards next, backwards for a negative direction, wrapping around."""
+        self.cursor = page_number
+        self.direction = 1 if direction >= 0 else -1
+
+    def poll(self):
+        """Collect finished diffs and keep the workers busy. Returns the pages that finished."""
+        finished = []
+        for page_number, future in list(self.pending.items()):
+            if future.done():
+                del self.pending[page_number]
+                try:
+                    self.results[page_number] = future.result()
+                except Exception as e:
+                    # Record the failure so seeking and progress move past this page
+                    self.results[page_number] = {
+                        'page': page_number, 'changed': 0.0, 'regions': [], 'missing': False,
+                        'elapsed': 0.0, 'error': str(e) or type(e).__name__,
+                    }
+                finished.append(page_number)
+        for offset in range(self.page_count):
+            if len(self.pending) >= self.ahead:
+                break
+            page_number = (self.cursor + offset * self.direction) % self.page_count
+            if page_number not in self.results and page_number not in self.pending:
+                self.pending[page_number] = self.executor.submit(_diff_job, page_number, self.scale)
+        return finished
+
+    def result(self, page_number):
+        return self.results.get(page_number)
+
+    def next_different(self, page_number, step=1):
+        """The next page in direction step with changes, as (page, known).
+
+        page is None when there is none; known is False when a page on the
+        way has not been diffed yet, so the answer may still change.
+        """
+        page_number += step
+        while 0 <= page_number < self.page_count:
+            result = self.results.get(page_number)
+            if result is None:
+                return None, False
+            if result['regions']:
+                return page_number, True
+            page_number += step
+        return None, True
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
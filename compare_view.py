@@ -0,0 +1,187 @@
+import os
+import tkinter as tk
+import customtkinter as ctk
+from PIL import ImageTk
+import fitz  # PyMuPDF
+
+from compare import CompareSession
+from rendering import render_image
+
+
+class CompareWindow(ctk.CTkToplevel):
+    """Two documents side by side at the same scale, with changed regions outlined on both."""
+
+    def __init__(self, master, path_a, path_b, metrics, zoom=1.0, pixel_ratio=1.0):
+        # Open everything first so a bad file fails before a window appears
+        docs = []
+        try:
+            for path in (path_a, path_b):
+                docs.append(fitz.open(path))
+            session = CompareSession(path_a, path_b)
+        except Exception:
+            for doc in docs:
+                doc.close()
+            raise
+        super().__init__(master)
+        self.title(f"Compare - {os.path.basename(path_a)} / {os.path.basename(path_b)}")
+        self.geometry("1300x800")
+        self.metrics = metrics
+        self.docs = tuple(docs)
+        self.session = session
+        self.current_page = 0
+        self.zoom = zoom
+        self.pixel_ratio = pixel_ratio
+        self.scale = zoom * pixel_ratio
+        self.images = [None, None]
+        self.seek_step = None
+        self.poll_job = None
+
+        self.grid_columnconfigure((0, 1), weight=1)
+        self.grid_rowconfigure(2, weight=1)
+
+        # Toolbar
+        toolbar = ctk.CTkFrame(self)
+        toolbar.grid(row=0, column=0, columnspan=2, sticky="ew", padx=5, pady=2)
+        ctk.CTkButton(toolbar, text="◀", command=lambda: self.go_to(self.current_page - 1), width=30).pack(side="left", padx=2)
+        ctk.CTkButton(toolbar, text="▶", command=lambda: self.go_to(self.current_page + 1), width=30).pack(side="left", padx=2)
+        ctk.CTkButton(toolbar, text="Previous Difference", command=lambda: self.seek_difference(-1), width=140).pack(side="left", padx=2)
+        ctk.CTkButton(toolbar, text="Next Difference", command=lambda: self.seek_difference(1), width=120).pack(side="left", padx=2)
+        ctk.CTkButton(toolbar, text="-", command=lambda: self.change_zoom(0.8), width=30).pack(side="left", padx=(10, 2))
+        ctk.CTkButton(toolbar, text="+", command=lambda: self.change_zoom(1.25), width=30).pack(side="left", padx=2)
+        self.page_label = ctk.CTkLabel(toolbar, text="")
+        self.page_label.pack(side="left", padx=10)
+
+        for column, path in enumerate((path_a, path_b)):
+            ctk.CTkLabel(self, text=path, anchor="w").grid(row=1, column=column, sticky="ew", padx=5)
+
+        # The two canvases scroll together
+        self.canvases = []
+        for column in range(2):
+            canvas = tk.Canvas(self, bg='gray60', highlightthickness=0)
+            canvas.grid(row=2, column=column, sticky="nsew", padx=(5 if column == 0 else 2, 2 if column == 0 else 5), pady=2)
+            canvas.bind("<MouseWheel>", lambda e: self.scroll(-1 * (e.delta // 120)))
+            canvas.bind("<Button-4>", lambda e: self.scroll(-1))
+            canvas.bind("<Button-5>", lambda e: self.scroll(1))
+            self.canvases.append(canvas)
+        self.v_scroll = ctk.CTkScrollbar(self, orientation="vertical", command=self._yview)
+        self.v_scroll.grid(row=2, column=2, sticky="ns")
+        self.canvases[0].configure(yscrollcommand=self.v_scroll.set)
+
+        self.status_var = tk.StringVar()
+        ctk.CTkLabel(self, textvariable=self.status_var, anchor="w", padx=10).grid(row=3, column=0, columnspan=3, sticky="ew")
+
+        self.bind("<Prior>", lambda e: self.go_to(self.current_page - 1))
+        self.bind("<Next>", lambda e: self.go_to(self.current_page + 1))
+        self.bind("<n>", lambda e: self.seek_difference(1))
+        self.bind("<p>", lambda e: self.seek_difference(-1))
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.show_page()
+        self._poll()
+
+    def _yview(self, *args):
+        for canvas in self.canvases:
+            canvas.yview(*args)
+
+    def scroll(self, units):
+        for canvas in self.canvases:
+            canvas.yview_scroll(units, "units")
+
+    def go_to(self, page_number):
+        if 0 <= page_number < self.session.page_count and page_number != self.current_page:
+            self.current_page = page_number
+            self.seek_step = None
+            self.show_page()
+
+    def change_zoom(self, factor):
+        self.zoom = max(0.1, min(5.0, self.zoom * factor))
+        self.scale = self.zoom * self.pixel_ratio
+        self.show_page()
+
+    def show_page(self):
+        # Both pages at the same scale so their pixels line up
+        self.session.focus(self.current_page)
+        with self.metrics.timer('compare.render'):
+            for index, (doc, canvas) in enumerate(zip(self.docs, self.canvases)):
+                canvas.delete("all")
+                self.images[index] = None
+                if self.current_page >= len(doc):
+                    canvas.create_text(20, 20, anchor="nw", text="No such page in this document", fill="white")
+                    continue
+                img = render_image(doc.load_page(self.current_page), self.scale)
+                self.images[index] = ImageTk.PhotoImage(img)
+                canvas.create_image(0, 0, anchor="nw", image=self.images[index])
+                canvas.config(scrollregion=(0, 0, img.width, img.height))
+        self.page_label.configure(text=f"Page {self.current_page + 1} of {self.session.page_count}")
+        self.draw_overlay()
+
+    def draw_overlay(self):
+        result = self.session.result(self.current_page)
+        for doc, canvas in zip(self.docs, self.canvases):
+            canvas.delete("diff")
+            if result is None or self.current_page >= len(doc):
+                continue
+            origin = doc.load_page(self.current_page).rect
+            for x0, y0, x1, y1 in result['regions']:
+                canvas.create_rectangle(
+                    (x0 - origin.x0) * self.scale, (y0 - origin.y0) * self.scale,
+                    (x1 - origin.x0) * self.scale, (y1 - origin.y0) * self.scale,
+                    outline="#e0245e", width=2, fill="#ff6b8b", stipple="gray25", tags="diff")
+
+    def seek_difference(self, step):
+        page_number, known = self.session.next_different(self.current_page, step)
+        if page_number is not None:
+            self.seek_step = None
+            self.go_to(page_number)
+            self.scroll_to_first_region()
+        elif known:
+            self.seek_step = None
+            self.status_var.set("No more differences in this direction")
+        else:
+            # Retried from the poll loop as the diffs come in
+            self.seek_step = step
+            self.session.focus(self.current_page + step, step)
+            self.status_var.set("Still comparing pages...")
+
+    def scroll_to_first_region(self):
+        result = self.session.result(self.current_page)
+        region = self.canvases[0].cget("scrollregion").split()
+        if not result or not result['regions'] or len(region) != 4:
+            return
+        doc = self.docs[0] if self.current_page < len(self.docs[0]) else self.docs[1]
+        top = (result['regions'][0][1] - doc.load_page(self.current_page).rect.y0) * self.scale
+        self._yview("moveto", max(0, top - 50) / max(float(region[3]), 1))
+
+    def _poll(self):
+        self.poll_job = None
+        for page_number in self.session.poll():
+            result = self.session.results[page_number]
+            if result.get('error'):
+                self.metrics.event(f"Compare failed on page {page_number + 1}: {result['error']}")
+            else:
+                self.metrics.record('compare.page_diff', result['elapsed'])
+            if page_number == self.current_page:
+                self.draw_overlay()
+        if self.seek_step is not None:
+            self.seek_difference(self.seek_step)
+        if self.seek_step is None:
+            self.status_var.set(self.progress_text())
+        if not self.session.done or self.seek_step is not None:
+            self.poll_job = self.after(50, self._poll)
+
+    def progress_text(self):
+        results = self.session.results
+        differing = sum(1 for result in results.values() if result['regions'])
+        failed = sum(1 for result in results.values() if result.get('error'))
+        suffix = f", {failed} could not be compared" if failed else ""
+        if self.session.done:
+            return f"{differing} of {self.session.page_count} pages differ{suffix}"
+        return f"Compared {len(results)} of {self.session.page_count} pages, {differing} differ so far{suffix}"
+
+    def close(self):
+        if self.poll_job:
+            self.after_cancel(self.poll_job)
+        self.session.close()
+        for doc in self.docs:
+            doc.close()
+        self.destroy()
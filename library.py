@@ -0,0 +1,184 @@
+import os
+import time
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF
+
+from session_store import default_state_dir
+
+THUMBNAIL_WIDTH = 160
+SORT_COLUMNS = {'title', 'author', 'pages', 'size', 'mtime', 'path'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    path TEXT PRIMARY KEY,
+    folder TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    pages INTEGER,
+    title TEXT,
+    author TEXT,
+    thumbnail BLOB,
+    error TEXT,
+    indexed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_folder ON documents (folder);
+CREATE INDEX IF NOT EXISTS documents_title ON documents (title COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS documents_author ON documents (author COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS folders (
+    path TEXT PRIMARY KEY
+);
+"""
+
+
+def default_catalog_path():
+    return default_state_dir() / 'library.db'
+
+
+def extract_metadata(path):
+    """Page count, title/author and a PNG first-page thumbnail. Runs in a worker process."""
+    result = {'path': path, 'pages': None, 'title': None, 'author': None, 'thumbnail': None, 'error': None}
+    try:
+        with fitz.open(path) as doc:
+            metadata = doc.metadata or {}
+            result['pages'] = len(doc)
+            result['title'] = metadata.get('title') or None
+            result['author'] = metadata.get('author') or None
+            if len(doc):
+                page = doc.load_page(0)
+                scale = THUMBNAIL_WIDTH / max(page.rect.width, 1)
+                pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=False)
+                result['thumbnail'] = pix.tobytes("png")
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+
+def find_pdfs(folder, onerror=None):
+    for dirpath, dirnames, filenames in os.walk(folder, onerror=onerror):
+        for name in filenames:
+            if name.lower().endswith('.pdf'):
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_mtime, stat.st_size
+
+
+def is_inside(path, folder):
+    return path.startswith(folder.rstrip(os.sep) + os.sep)
+
+
+class LibraryCatalog:
+    """SQLite catalog of the PDFs found under the library folders.
+
+    A connection belongs to the thread that created the catalog, so scans
+    running on a background thread open their own ``LibraryCatalog``.
+    """
+
+    def __init__(self, path=None):
+        self.path = str(path or default_catalog_path())
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def folders(self):
+        return [row[0] for row in self.conn.execute("SELECT path FROM folders ORDER BY path")]
+
+    def add_folder(self, folder):
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO folders (path) VALUES (?)", (os.path.abspath(folder),))
+
+    def scan(self, folders=None, workers=None, progress=None):
+        """Index new or changed PDFs (by mtime and size) and drop ones that have gone.
+
+        A folder inside another library folder is covered by the outer one, so
+        every file belongs to exactly one scan. Documents are only dropped under
+        folders that were walked without errors: an unreachable network share
+        must not wipe its part of the catalog. Returns ``(indexed, removed, unchanged)``.
+        """
+        folders = sorted({os.path.abspath(f) for f in (folders or self.folders())})
+        roots = [f for f in folders if not any(f != other and is_inside(f, other) for other in folders)]
+
+        found = {}
+        complete = []
+        for root in roots:
+            errors = []
+            if not os.path.isdir(root):
+                continue
+            for path, mtime, size in find_pdfs(root, onerror=errors.append):
+                found[path] = (mtime, size, root)
+            if not errors:
+                complete.append(root)
+        known = {
+            path: (mtime, size)
+            for path, mtime, size in self.conn.execute("SELECT path, mtime, size FROM documents")
+            if any(is_inside(path, root) for root in roots)
+        }
+        stale = [path for path, (mtime, size, _) in found.items() if known.get(path) != (mtime, size)]
+        gone = [path for path in known if path not in found and any(is_inside(path, root) for root in complete)]
+        unchanged = len(found) - len(stale)
+
+        with self.conn:
+            self.conn.executemany("DELETE FROM documents WHERE path = ?", [(p,) for p in gone])
+
+        indexed = 0
+        if stale:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                batch = []
+                for result in pool.map(extract_metadata, stale, chunksize=8):
+                    mtime, size, root = found[result['path']]
+                    batch.append((
+                        result['path'], root, mtime, size, result['pages'], result['title'],
+                        result['author'], result['thumbnail'], result['error'], time.time(),
+                    ))
+                    indexed += 1
+                    if len(batch) >= 200:
+                        self._store(batch)
+                        batch = []
+                    if progress:
+                        progress(indexed, len(stale))
+                self._store(batch)
+        return indexed, len(gone), unchanged
+
+    def _store(self, rows):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO documents "
+                "(path, folder, mtime, size, pages, title, author, thumbnail, error, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def count(self, text=''):
+        where, params = self._filter(text)
+        return self.conn.execute(f"SELECT COUNT(*) FROM documents {where}", params).fetchone()[0]
+
+    def query(self, text='', order_by='title', descending=False, limit=2000):
+        if order_by not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by {order_by}")
+        where, params = self._filter(text)
+        direction = 'DESC' if descending else 'ASC'
+        collate = ' COLLATE NOCASE' if order_by in ('title', 'author', 'path') else ''
+        sql = (
+            f"SELECT path, title, author, pages, size, mtime FROM documents {where} "
+            f"ORDER BY {order_by}{collate} {direction} LIMIT ?"
+        )
+        return self.conn.execute(sql, params + [limit]).fetchall()
+
+    def thumbnail(self, path):
+        row = self.conn.execute("SELECT thumbnail FROM documents WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else None
+
+    def _filter(self, text):
+        text = text.strip()
+        if not text:
+            return '', []
+        pattern = f"%{text}%"
+        return "WHERE title LIKE ? OR author LIKE ? OR path LIKE ?", [pattern, pattern, pattern]
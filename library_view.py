@@ -0,0 +1,172 @@
+import io
+import os
+import time
+import threading
+import tkinter as tk
+from tkinter import ttk, filedialog
+import customtkinter as ctk
+from PIL import Image, ImageTk
+
+from library import LibraryCatalog
+
+COLUMNS = [
+    ('title', "Title", 260),
+    ('author', "Author", 140),
+    ('pages', "Pages", 60),
+    ('size', "Size", 80),
+    ('mtime', "Modified", 130),
+    ('path', "Path", 300),
+]
+
+
+class LibraryWindow(ctk.CTkToplevel):
+    """Browse, sort and filter the catalogued PDFs; double-click opens one in the reader."""
+
+    def __init__(self, master, on_open, catalog_path=None):
+        super().__init__(master)
+        self.title("Library")
+        self.geometry("1000x600")
+        self.on_open = on_open
+        self.catalog_path = catalog_path
+        self.catalog = LibraryCatalog(catalog_path)
+        self.sort_column = 'title'
+        self.sort_descending = False
+        self.scan_thread = None
+        self.scan_progress = None
+        self.scan_result = None
+        self.scan_started = None
+        self.thumbnail_img = None
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        # Toolbar
+        toolbar = ctk.CTkFrame(self)
+        toolbar.grid(row=0, column=0, columnspan=2, sticky="ew", padx=5, pady=2)
+        ctk.CTkButton(toolbar, text="Add Folder...", command=self.add_folder, width=100).pack(side="left", padx=2)
+        ctk.CTkButton(toolbar, text="Rescan", command=self.start_scan, width=80).pack(side="left", padx=2)
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", lambda *args: self.refresh())
+        ctk.CTkEntry(toolbar, textvariable=self.filter_var, placeholder_text="Filter", width=240).pack(side="left", padx=10)
+        self.count_label = ctk.CTkLabel(toolbar, text="")
+        self.count_label.pack(side="left", padx=10)
+
+        # Document list
+        list_frame = ctk.CTkFrame(self)
+        list_frame.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
+        list_frame.grid_columnconfigure(0, weight=1)
+        list_frame.grid_rowconfigure(0, weight=1)
+        self.tree = ttk.Treeview(list_frame, columns=[c[0] for c in COLUMNS], show="headings", selectmode="browse")
+        for key, label, width in COLUMNS:
+            self.tree.heading(key, text=label, command=lambda k=key: self.sort_by(k))
+            self.tree.column(key, width=width, anchor="e" if key in ('pages', 'size') else "w")
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        scroll = ctk.CTkScrollbar(list_frame, orientation="vertical", command=self.tree.yview)
+        scroll.grid(row=0, column=1, sticky="ns")
+        self.tree.configure(yscrollcommand=scroll.set)
+        self.tree.bind("<<TreeviewSelect>>", self.show_thumbnail)
+        self.tree.bind("<Double-1>", self.open_selected)
+        self.tree.bind("<Return>", self.open_selected)
+
+        # First-page preview
+        self.preview = ctk.CTkLabel(self, text="", width=180)
+        self.preview.grid(row=1, column=1, sticky="n", padx=5, pady=5)
+
+        self.status_var = tk.StringVar()
+        ctk.CTkLabel(self, textvariable=self.status_var, anchor="w", padx=10).grid(row=2, column=0, columnspan=2, sticky="ew")
+
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.refresh()
+        if self.catalog.folders():
+            self.start_scan()
+
+    def refresh(self):
+        # Only the first rows are put in the tree; sorting and filtering happen in SQLite
+        text = self.filter_var.get()
+        rows = self.catalog.query(text, self.sort_column, self.sort_descending)
+        self.tree.delete(*self.tree.get_children())
+        for path, title, author, pages, size, mtime in rows:
+            self.tree.insert("", "end", iid=path, values=(
+                title or os.path.basename(path),
+                author or "",
+                pages if pages is not None else "?",
+                f"{size / (1024 * 1024):.1f} MB",
+                time.strftime("%Y-%m-%d %H:%M", time.localtime(mtime)),
+                path,
+            ))
+        total = self.catalog.count(text)
+        shown = f"Showing {len(rows)} of {total}" if total > len(rows) else f"{total} documents"
+        self.count_label.configure(text=shown)
+
+    def sort_by(self, column):
+        if column == self.sort_column:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_column = column
+            self.sort_descending = False
+        self.refresh()
+
+    def add_folder(self):
+        folder = filedialog.askdirectory(parent=self, title="Add Library Folder")
+        if folder:
+            self.catalog.add_folder(folder)
+            self.start_scan()
+
+    def start_scan(self):
+        if self.scan_thread and self.scan_thread.is_alive():
+            return
+        self.scan_progress = (0, 0)
+        self.scan_result = None
+        self.scan_started = time.perf_counter()
+        self.scan_thread = threading.Thread(target=self._scan, daemon=True)
+        self.scan_thread.start()
+        self.status_var.set("Scanning library folders...")
+        self.after(200, self._poll_scan)
+
+    def _scan(self):
+        # Runs on a background thread with its own connection; workers are separate processes
+        catalog = LibraryCatalog(self.catalog_path or self.catalog.path)
+        try:
+            self.scan_result = catalog.scan(progress=self._on_progress)
+        except Exception as e:
+            self.scan_result = e
+        finally:
+            catalog.close()
+
+    def _on_progress(self, done, total):
+        self.scan_progress = (done, total)
+
+    def _poll_scan(self):
+        if self.scan_thread and self.scan_thread.is_alive():
+            done, total = self.scan_progress
+            if total:
+                self.status_var.set(f"Indexing {done}/{total} documents...")
+            self.after(200, self._poll_scan)
+            return
+        if isinstance(self.scan_result, Exception):
+            self.status_var.set(f"Scan failed: {str(self.scan_result)}")
+            return
+        indexed, removed, unchanged = self.scan_result
+        elapsed = time.perf_counter() - self.scan_started
+        self.status_var.set(f"Indexed {indexed}, removed {removed}, unchanged {unchanged} in {elapsed:.1f}s")
+        self.refresh()
+
+    def show_thumbnail(self, event=None):
+        selection = self.tree.selection()
+        if not selection:
+            return
+        data = self.catalog.thumbnail(selection[0])
+        if not data:
+            self.preview.configure(image="", text="No preview")
+            return
+        self.thumbnail_img = ImageTk.PhotoImage(Image.open(io.BytesIO(data)))
+        self.preview.configure(image=self.thumbnail_img, text="")
+
+    def open_selected(self, event=None):
+        selection = self.tree.selection()
+        if selection:
+            self.on_open(selection[0])
+
+    def close(self):
+        self.catalog.close()
+        self.destroy()
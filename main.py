@@ -1,13 +1,50 @@
 import sys
 import os
+import multiprocessing
+import single_instance
+
+if __name__ == "__main__":
+    # Library scan workers of a frozen build run here and exit
+    multiprocessing.freeze_support()
+    # Headless tile server for browser clients; never loads the GUI
+    if '--serve' in sys.argv:
+        import tile_server
+        sys.exit(tile_server.main(sys.argv[1:]))
+    # Hand the file to an already running reader before paying for the GUI imports
+    if single_instance.hand_off(sys.argv[1:]):
+        sys.exit(0)
+
 import tkinter as tk
-from tkinter import messagebox, filedialog
+from tkinter import messagebox, filedialog, simpledialog
 import customtkinter as ctk
-from PIL import Image, ImageTk
+from PIL import ImageTk
 import fitz  # PyMuPDF
-import io
+import queue
+import threading
+from metrics import Metrics
+from render_cache import RenderCache
+from memory_monitor import MemoryMonitor, QUALITY_PROFILES, NORMAL
+from session_store import SessionStore
+from search import SearchWorker, next_hit
+from library_view import LibraryWindow
+from presentation_view import PresentationWindow
+from mupdf_store import StoreManager
+from remote_document import RemoteDocument, is_url
+from rendering import render_image, render_pixmap, apply_tone, PROFILES, COLOR
+
+def document_key(path):
+    # Local files are remembered by absolute path, remote ones by URL
+    return path if is_url(path) else os.path.abspath(path)
+
 
 class NathFileReader(ctk.CTk):
+    # Largest bitmap a single render may allocate; bigger pages are rendered clipped to the viewport
+    MAX_RENDER_PIXELS = 16_000_000
+    # Soft limit for MuPDF's cache of decoded images, fonts and parsed objects
+    MUPDF_STORE_MB = 256
+    # Quiet period after the last page, zoom or file change before the session is written
+    SESSION_SAVE_DELAY_MS = 1000
+    
     def __init__(self):
         super().__init__()
         
@@ -19,6 +56,44 @@ class NathFileReader(ctk.CTk):
         self.doc = None
         self.current_page = 0
         self.zoom = 1.0
+        self.scale = 1.0
+        
+        # Rendering state, adjusted by the memory monitor
+        self.metrics = Metrics()
+        self.quality = dict(QUALITY_PROFILES[NORMAL])
+        self.render_cache = RenderCache(self.quality['cache_entries'], self.quality['cache_bytes'])
+        self.prefetch_job = None
+        self.clip_job = None
+        self.clip_region = None
+        self.session_store = SessionStore()
+        self.settings = self.session_store.load_settings({
+            'max_render_pixels': self.MAX_RENDER_PIXELS,
+            'mupdf_store_mb': self.MUPDF_STORE_MB,
+        })
+        self.max_render_pixels = int(self.settings['max_render_pixels'])
+        self.store_manager = StoreManager(self.metrics, self.settings['mupdf_store_mb'])
+        self.snapshot_img = None
+        self.session_job = None
+        
+        # Colour profile per document, remembered across sessions
+        self.document_profiles = self.session_store.load().get('profiles', {})
+        self.profile = COLOR
+        self.profile_var = tk.StringVar(value=COLOR)
+        
+        # Incremental search state
+        self.search_worker = None
+        self.search_generation = None
+        self.search_hits = {}
+        self.search_order = []
+        self.search_pages = []
+        self.search_hit = None
+        self.search_job = None
+        
+        # Documents opened from a URL: page 1 is shown while the rest downloads
+        self.remote = None
+        self.remote_preview = False
+        self.remote_events = queue.Queue()
+        self.remote_job = None
         
         # Configure grid
         self.grid_columnconfigure(0, weight=1)
@@ -40,11 +115,14 @@ class NathFileReader(ctk.CTk):
         # Scrollbars
         self.v_scroll = ctk.CTkScrollbar(self.content_frame, orientation="vertical", command=self.canvas.yview)
         self.h_scroll = ctk.CTkScrollbar(self.content_frame, orientation="horizontal", command=self.canvas.xview)
-        self.canvas.configure(yscrollcommand=self.v_scroll.set, xscrollcommand=self.h_scroll.set)
+        self.canvas.configure(yscrollcommand=self._on_yscroll, xscrollcommand=self._on_xscroll)
         
         self.v_scroll.grid(row=0, column=1, sticky="ns")
         self.h_scroll.grid(row=1, column=0, sticky="ew")
         
+        # Search panel, shown with Ctrl+F
+        self.create_search_panel()
+        
         # Status bar
         self.status_var = tk.StringVar()
         self.status_var.set("Ready")
@@ -58,6 +136,10 @@ class NathFileReader(ctk.CTk):
         self.canvas.bind("<MouseWheel>", self._on_mousewheel)
         self.canvas.bind("<Button-4>", lambda e: self._on_mousewheel(e, delta=120))
         self.canvas.bind("<Button-5>", lambda e: self._on_mousewheel(e, delta=-120))
+        
+        # Watch memory usage and degrade render quality under pressure
+        self.memory_monitor = MemoryMonitor(self, self.on_memory_pressure, metrics=self.metrics)
+        self.memory_monitor.start()
     
     def create_toolbar(self):
         toolbar = ctk.CTkFrame(self)
@@ -88,16 +170,27 @@ class NathFileReader(ctk.CTk):
         # File menu
         file_menu = tk.Menu(menubar, tearoff=0)
         file_menu.add_command(label="Open...", command=self.open_file, accelerator="Ctrl+O")
+        file_menu.add_command(label="Open URL...", command=self.open_url, accelerator="Ctrl+U")
+        file_menu.add_command(label="Library...", command=self.show_library, accelerator="Ctrl+L")
+        file_menu.add_command(label="Compare With...", command=self.show_compare)
         file_menu.add_separator()
         file_menu.add_command(label="Print...", command=self.print_document, accelerator="Ctrl+P")
         file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.quit)
+        file_menu.add_command(label="Exit", command=self.on_closing)
         menubar.add_cascade(label="File", menu=file_menu)
         
         # View menu
         view_menu = tk.Menu(menubar, tearoff=0)
         view_menu.add_command(label="Zoom In", command=lambda: self.change_zoom(1.25), accelerator="Ctrl++")
         view_menu.add_command(label="Zoom Out", command=lambda: self.change_zoom(0.8), accelerator="Ctrl+-")
+        view_menu.add_command(label="Find...", command=self.show_search, accelerator="Ctrl+F")
+        view_menu.add_command(label="Presentation", command=self.start_presentation, accelerator="F5")
+        view_menu.add_separator()
+        profile_menu = tk.Menu(view_menu, tearoff=0)
+        for profile, label in PROFILES.items():
+            profile_menu.add_radiobutton(label=label, value=profile, variable=self.profile_var,
+                                         command=lambda p=profile: self.set_profile(p))
+        view_menu.add_cascade(label="Colour Profile", menu=profile_menu)
         view_menu.add_separator()
         view_menu.add_command(label="Previous Page", command=self.prev_page, accelerator="Page Up")
         view_menu.add_command(label="Next Page", command=self.next_page, accelerator="Page Down")
@@ -105,6 +198,8 @@ class NathFileReader(ctk.CTk):
         
         # Help menu
         help_menu = tk.Menu(menubar, tearoff=0)
+        help_menu.add_command(label="Performance Metrics", command=self.show_metrics)
+        help_menu.add_command(label="MuPDF Diagnostics...", command=self.show_diagnostics)
         help_menu.add_command(label="About", command=self.show_about)
         menubar.add_cascade(label="Help", menu=help_menu)
         
@@ -113,12 +208,150 @@ class NathFileReader(ctk.CTk):
         # Bind keyboard shortcuts
         self.bind("<Control-o>", lambda e: self.open_file())
         self.bind("<Control-p>", lambda e: self.print_document())
+        self.bind("<Control-f>", lambda e: self.show_search())
+        self.bind("<Control-l>", lambda e: self.show_library())
+        self.bind("<Control-u>", lambda e: self.open_url())
+        self.bind("<F5>", lambda e: self.start_presentation())
         self.bind("<Control-plus>", lambda e: self.change_zoom(1.25))
         self.bind("<Control-minus>", lambda e: self.change_zoom(0.8))
         self.bind("<Prior>", lambda e: self.prev_page())  # Page Up
         self.bind("<Next>", lambda e: self.next_page())    # Page Down
     
-    def open_file(self, filepath=None):
+    def create_search_panel(self):
+        self.search_panel = ctk.CTkFrame(self.content_frame, width=220)
+        self.search_panel.grid(row=0, column=2, rowspan=2, sticky="ns", padx=(5, 0))
+        self.search_panel.grid_rowconfigure(1, weight=1)
+        
+        self.search_var = tk.StringVar()
+        self.search_entry = ctk.CTkEntry(self.search_panel, textvariable=self.search_var, placeholder_text="Find in document")
+        self.search_entry.grid(row=0, column=0, sticky="ew", padx=5, pady=5)
+        self.search_entry.bind("<Return>", lambda e: self.next_search_hit())
+        self.search_entry.bind("<Escape>", lambda e: self.hide_search())
+        
+        self.search_list = tk.Listbox(self.search_panel, activestyle="none", width=28)
+        self.search_list.grid(row=1, column=0, sticky="nsew", padx=5, pady=(0, 5))
+        self.search_list.bind("<<ListboxSelect>>", self._on_search_result_selected)
+        
+        self.search_var.trace_add("write", lambda *args: self.start_search())
+        self.search_panel.grid_remove()
+    
+    def show_search(self):
+        self.search_panel.grid()
+        self.search_entry.focus_set()
+    
+    def hide_search(self):
+        self.stop_search()
+        self.clear_search_results()
+        self.search_panel.grid_remove()
+    
+    def clear_search_results(self):
+        self.search_hits = {}
+        self.search_order = []
+        self.search_pages = []
+        self.search_hit = None
+        self.search_list.delete(0, tk.END)
+        self.canvas.delete("highlight")
+    
+    def start_search(self):
+        # Every keystroke cancels the previous scan and starts again from the current page
+        query = self.search_var.get().strip()
+        self.clear_search_results()
+        if not query or not self.doc:
+            self.stop_search()
+            return
+        if self.remote_preview:
+            self.stop_search()
+            self.status_var.set("Search is available once the document has finished downloading")
+            return
+        if self.search_worker is None:
+            self.search_worker = SearchWorker(self.doc.name)
+            self.search_worker.start()
+        self.search_generation = self.search_worker.search(query, self.current_page)
+        self.status_var.set(f"Searching for '{query}'...")
+        if self.search_job is None:
+            self.search_job = self.after(15, self._poll_search)
+    
+    def stop_search(self):
+        if self.search_worker:
+            self.search_worker.cancel()
+        self.search_generation = None
+        if self.search_job:
+            self.after_cancel(self.search_job)
+            self.search_job = None
+    
+    def close_search_worker(self):
+        self.stop_search()
+        if self.search_worker:
+            self.search_worker.close()
+            self.search_worker = None
+    
+    def _poll_search(self):
+        self.search_job = None
+        if not self.search_worker:
+            return
+        finished = False
+        while True:
+            try:
+                generation, page_number, rects = self.search_worker.results.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self.search_generation:
+                continue
+            if page_number is None:
+                finished = True
+                break
+            if not self.search_order and self.search_worker.first_hit_after is not None:
+                self.metrics.record('search.first_hit', self.search_worker.first_hit_after)
+            self.search_hits[page_number] = rects
+            self.search_pages.append(page_number)
+            for index in range(len(rects)):
+                self.search_order.append((page_number, index))
+            self.search_list.insert(tk.END, f"Page {page_number + 1}  ({len(rects)} hits)")
+            if page_number == self.current_page:
+                self.draw_highlights()
+        
+        total = len(self.search_order)
+        query = self.search_var.get().strip()
+        if finished:
+            self.status_var.set(f"{total} matches for '{query}'")
+        else:
+            self.status_var.set(f"Searching for '{query}'... {total} matches so far")
+            self.search_job = self.after(30, self._poll_search)
+    
+    def _on_search_result_selected(self, event=None):
+        selection = self.search_list.curselection()
+        if not selection:
+            return
+        self.go_to_search_hit(self.search_pages[selection[0]], 0)
+    
+    def next_search_hit(self):
+        hit = next_hit(self.search_order, self.current_page, self.search_hit)
+        if hit is not None:
+            self.go_to_search_hit(*hit)
+    
+    def go_to_search_hit(self, page_number, index):
+        self.search_hit = (page_number, index)
+        if page_number != self.current_page:
+            self.current_page = page_number
+            self.update_page()
+        x0, y0, x1, y1 = self.hit_canvas_rect(self.search_hits[page_number][index])
+        region = self.canvas.cget("scrollregion").split()
+        if len(region) == 4:
+            self.canvas.xview_moveto(max(0, x0 - 50) / max(float(region[2]), 1))
+            self.canvas.yview_moveto(max(0, y0 - 50) / max(float(region[3]), 1))
+    
+    def hit_canvas_rect(self, rect):
+        page_rect = self.doc.load_page(self.current_page).rect
+        return tuple((value - origin) * self.scale for value, origin in zip(rect, (page_rect.x0, page_rect.y0) * 2))
+    
+    def draw_highlights(self):
+        # Hit rectangles are kept in page coordinates so they survive zooming and re-rendering
+        self.canvas.delete("highlight")
+        for rect in self.search_hits.get(self.current_page, []):
+            self.canvas.create_rectangle(
+                *self.hit_canvas_rect(rect), outline="#f2b600", width=2, fill="#ffe066", stipple="gray25", tags="highlight")
+    
+    def open_file(self, filepath=None, page=0, zoom=1.0, scroll=None):
         if not filepath:
             filepath = filedialog.askopenfilename(
                 title="Open Document",
@@ -134,9 +367,20 @@ class NathFileReader(ctk.CTk):
         if not filepath:
             return
         
+        if is_url(filepath):
+            self.open_remote(filepath, page, zoom, scroll)
+            return
+        
+        # A local file replaces any document still downloading
+        self.remote = None
+        self.remote_preview = False
+        
         try:
             if filepath.lower().endswith('.pdf'):
-                self.load_pdf(filepath)
+                self.load_pdf(filepath, page, zoom)
+                if scroll and self.doc:
+                    self.canvas.xview_moveto(scroll[0])
+                    self.canvas.yview_moveto(scroll[1])
             else:
                 messagebox.showinfo("Info", f"File format not yet supported: {os.path.basename(filepath)}")
                 return
@@ -148,7 +392,111 @@ class NathFileReader(ctk.CTk):
         except Exception as e:
             messagebox.showerror("Error", f"Could not open file: {str(e)}")
     
-    def load_pdf(self, filepath):
+    def open_url(self):
+        url = simpledialog.askstring("Open URL", "Address of a PDF document:", parent=self)
+        if url and url.strip():
+            self.open_file(url.strip())
+    
+    def open_remote(self, url, page=0, zoom=1.0, scroll=None):
+        # Any download still running for another URL stops at its next batch of chunks
+        self.remote = RemoteDocument(url)
+        self.remote_preview = False
+        self.remote_target = (page, zoom, scroll)
+        self.metrics.event(f"Opening {url}")
+        self.status_var.set(f"Connecting to {url}...")
+        threading.Thread(target=self._download_remote, args=(self.remote,), daemon=True).start()
+        if self.remote_job is None:
+            self.remote_job = self.after(50, self._poll_remote)
+    
+    def _download_remote(self, remote):
+        events = self.remote_events
+        try:
+            with self.metrics.timer('remote.first_page') as timer:
+                preview = remote.fetch_first_page()
+            events.put(('first_page', remote, preview, timer.elapsed))
+            finished = remote.download_rest(
+                progress=lambda done, total: events.put(('progress', remote, done, total)),
+                cancelled=lambda: remote is not self.remote)
+            if finished:
+                events.put(('complete', remote))
+        except Exception as e:
+            events.put(('error', remote, str(e)))
+    
+    def _poll_remote(self):
+        self.remote_job = None
+        while True:
+            try:
+                event = self.remote_events.get_nowait()
+            except queue.Empty:
+                break
+            kind, remote = event[0], event[1]
+            if remote is not self.remote:
+                continue
+            if kind == 'first_page':
+                self.show_remote_preview(remote, event[2], event[3])
+            elif kind == 'progress':
+                done, total = event[2], event[3]
+                self.status_var.set(f"Downloading {remote.url}: {done * 100 // max(total, 1)}%")
+            elif kind == 'complete':
+                self.finish_remote(remote)
+            elif kind == 'error':
+                self.remote = None
+                if self.remote_preview:
+                    self.close_remote_preview()
+                messagebox.showerror("Error", f"Could not download document: {event[2]}")
+        if self.remote is not None:
+            self.remote_job = self.after(50, self._poll_remote)
+    
+    def show_remote_preview(self, remote, linearized, elapsed):
+        if remote.complete or not linearized:
+            if not remote.complete:
+                self.status_var.set(f"Downloading {remote.url} (not optimized for web viewing)...")
+            return
+        doc = remote.open_preview()
+        if doc is None:
+            self.status_var.set(f"Downloading {remote.url}...")
+            return
+        self.metrics.event(f"First page of {remote.url} after {elapsed * 1000:.0f}ms, "
+                           f"{remote.file.bytes_fetched // 1024}KB of {remote.file.length // 1024}KB")
+        self.remote_preview = True
+        self.load_pdf(remote.path, 0, self.remote_target[1], doc=doc, name=remote.url)
+        self.current_file = remote.url
+        self.title(f"NathFile Reader - {remote.url}")
+    
+    def close_remote_preview(self):
+        # The sparse copy still has holes, so nothing may be read from it once the download has stopped
+        self.remote_preview = False
+        self.cancel_prefetch()
+        self.close_search_worker()
+        self.clear_search_results()
+        self.render_cache.clear()
+        if self.doc:
+            self.doc.close()
+            self.doc = None
+        self.current_file = None
+        self.canvas.delete("all")
+        self.page_label.configure(text="Page: 0/0")
+        self.title("NathFile Reader")
+        self.status_var.set("Ready")
+    
+    def finish_remote(self, remote):
+        # Reopen from the complete copy, which no longer needs MuPDF's in-memory repair
+        page, zoom, scroll = self.remote_target
+        if self.remote_preview:
+            # The preview only ever shows page 1, so keep the requested page but any zoom change
+            zoom = self.zoom
+        self.remote = None
+        self.remote_preview = False
+        self.load_pdf(remote.path, page, zoom, name=remote.url)
+        if self.doc:
+            if scroll:
+                self.canvas.xview_moveto(scroll[0])
+                self.canvas.yview_moveto(scroll[1])
+            self.current_file = remote.url
+            self.title(f"NathFile Reader - {remote.url}")
+            self.status_var.set(f"Opened: {remote.url}")
+    
+    def load_pdf(self, filepath, page=0, zoom=1.0, doc=None, name=None):
         try:
             if self.doc:
                 self.doc.close()
@@ -157,10 +505,17 @@ class NathFileReader(ctk.CTk):
             if not os.path.exists(filepath):
                 raise FileNotFoundError(f"File not found: {filepath}")
                 
-            self.doc = fitz.open(filepath)
+            self.cancel_prefetch()
+            self.close_search_worker()
+            self.clear_search_results()
+            self.render_cache.clear()
+            self.doc = doc or fitz.open(filepath)
             print(f"Successfully opened PDF with {len(self.doc)} pages")
-            self.current_page = 0
-            self.zoom = 1.0
+            self.current_page = max(0, min(page, len(self.doc) - 1))
+            self.zoom = zoom
+            self.profile = self.document_profiles.get(document_key(name or filepath), COLOR)
+            self.profile_var.set(self.profile)
+            self.snapshot_img = None
             self.update_page()
             
         except Exception as e:
@@ -176,31 +531,35 @@ class NathFileReader(ctk.CTk):
                 print("No document loaded")
                 return
             
-            print(f"Loading page {self.current_page}")
-            page = self.doc.load_page(self.current_page)
-            zoom_matrix = fitz.Matrix(self.zoom, self.zoom)
-            
-            print("Rendering page...")
-            pix = page.get_pixmap(matrix=zoom_matrix)
-            print(f"Page rendered: {pix.width}x{pix.height}")
-            
-            # Convert to ImageTk format
-            print("Converting to PPM...")
-            img_data = pix.tobytes("ppm")
-            print("Creating PIL image...")
-            img = Image.open(io.BytesIO(img_data))
-            print("Creating PhotoImage...")
-            self.tk_img = ImageTk.PhotoImage(image=img)
-            
-            # Update canvas
-            print("Updating canvas...")
-            self.canvas.delete("all")
-            self.canvas.config(scrollregion=(0, 0, self.tk_img.width(), self.tk_img.height()))
-            self.canvas.create_image(0, 0, anchor="nw", image=self.tk_img)
+            self.cancel_prefetch()
+            self.scale = self.zoom * self.device_pixel_ratio()
+            if self.quality['clip_to_viewport'] or self.exceeds_pixel_budget(self.current_page):
+                self.render_visible_region()
+            else:
+                key = (self.current_page, self.scale, self.profile)
+                self.tk_img = self.render_cache.get(key)
+                if self.tk_img is None:
+                    self.metrics.incr('render.cache_miss')
+                    print(f"Rendering page {self.current_page}...")
+                    self.tk_img = self.render_page(self.current_page)
+                    if not self.remote_preview:
+                        self.render_cache.put(key, self.tk_img, self.tk_img.width() * self.tk_img.height() * 4)
+                else:
+                    self.metrics.incr('render.cache_hit')
+                
+                # Update canvas
+                self.clip_region = None
+                self.canvas.delete("all")
+                self.canvas.config(scrollregion=(0, 0, self.tk_img.width(), self.tk_img.height()))
+                self.canvas.create_image(0, 0, anchor="nw", image=self.tk_img)
+                self.draw_highlights()
             
             # Update page label
             self.page_label.configure(text=f"Page: {self.current_page + 1}/{len(self.doc)}")
-            print("Page update complete")
+            self.metrics.gauge('render.cache_pages', len(self.render_cache))
+            self.metrics.gauge('render.cache_mb', self.render_cache.bytes // (1024 * 1024))
+            self.schedule_prefetch()
+            self.schedule_session_save()
             
         except Exception as e:
             error_msg = f"Error updating page: {str(e)}"
@@ -209,7 +568,150 @@ class NathFileReader(ctk.CTk):
             import traceback
             traceback.print_exc()
     
+    def device_pixel_ratio(self):
+        # Physical pixels per 96 DPI logical pixel, as reported by Tk for the current screen
+        try:
+            return max(1.0, self.winfo_fpixels('1i') / 96.0)
+        except tk.TclError:
+            return 1.0
+    
+    def exceeds_pixel_budget(self, page_number):
+        rect = self.doc.load_page(page_number).rect
+        return rect.width * self.scale * rect.height * self.scale > self.max_render_pixels
+    
+    def render_page(self, page_number, clip=None):
+        page = self.doc.load_page(page_number)
+        with self.metrics.timer('render.page'):
+            img = render_image(page, self.scale, clip, self.profile)
+            tk_img = ImageTk.PhotoImage(image=img)
+        self.store_manager.enforce_budget()
+        return tk_img
+    
+    def render_visible_region(self):
+        # Render only the viewport plus a margin instead of the whole page
+        page_rect = self.doc.load_page(self.current_page).rect
+        full_width = int(page_rect.width * self.scale)
+        full_height = int(page_rect.height * self.scale)
+        self.canvas.config(scrollregion=(0, 0, full_width, full_height))
+        
+        view_width = max(self.canvas.winfo_width(), 1)
+        view_height = max(self.canvas.winfo_height(), 1)
+        left = self.canvas.canvasx(0)
+        top = self.canvas.canvasy(0)
+        margin_x = view_width // 2
+        margin_y = view_height // 2
+        if (view_width + 2 * margin_x) * (view_height + 2 * margin_y) > self.max_render_pixels:
+            margin_x = margin_y = 0
+        region = (
+            max(0, left - margin_x),
+            max(0, top - margin_y),
+            min(full_width, left + view_width + margin_x),
+            min(full_height, top + view_height + margin_y),
+        )
+        clip = self.page_clip(page_rect, region)
+        
+        self.tk_img = self.render_page(self.current_page, clip=clip)
+        self.metrics.incr('render.clipped')
+        x, y = int(region[0]), int(region[1])
+        self.canvas.delete("all")
+        self.canvas.create_image(x, y, anchor="nw", image=self.tk_img)
+        self.draw_highlights()
+        self.clip_region = (x, y, x + self.tk_img.width(), y + self.tk_img.height())
+    
+    def page_clip(self, page_rect, region):
+        # Convert a region in canvas pixels into page coordinates for get_pixmap
+        return fitz.Rect(region) / self.scale + (page_rect.x0, page_rect.y0, page_rect.x0, page_rect.y0)
+    
+    def _on_yscroll(self, first, last):
+        self.v_scroll.set(first, last)
+        self.schedule_clip_refresh()
+    
+    def _on_xscroll(self, first, last):
+        self.h_scroll.set(first, last)
+        self.schedule_clip_refresh()
+    
+    def schedule_clip_refresh(self):
+        if not self.doc or not self.clip_region or self.clip_job:
+            return
+        left = self.canvas.canvasx(0)
+        top = self.canvas.canvasy(0)
+        right = left + self.canvas.winfo_width()
+        bottom = top + self.canvas.winfo_height()
+        x0, y0, x1, y1 = self.clip_region
+        if left >= x0 and top >= y0 and right <= x1 and bottom <= y1:
+            return
+        self.clip_job = self.after(30, self._refresh_clip)
+    
+    def _refresh_clip(self):
+        self.clip_job = None
+        if self.doc and self.clip_region:
+            self.render_visible_region()
+    
+    def schedule_prefetch(self):
+        # Pages of a partly downloaded document may still be holes in the local copy
+        if self.remote_preview:
+            return
+        if self.quality['prefetch_depth'] > 0 and not self.quality['clip_to_viewport']:
+            self.prefetch_job = self.after(50, self._prefetch_next)
+    
+    def cancel_prefetch(self):
+        if self.prefetch_job:
+            self.after_cancel(self.prefetch_job)
+            self.prefetch_job = None
+    
+    def _prefetch_next(self):
+        # Render one neighbouring page per idle slot so input stays responsive
+        self.prefetch_job = None
+        if not self.doc:
+            return
+        depth = self.quality['prefetch_depth']
+        for offset in range(1, depth + 1):
+            for page_number in (self.current_page + offset, self.current_page - offset):
+                key = (page_number, self.scale, self.profile)
+                if not 0 <= page_number < len(self.doc) or key in self.render_cache:
+                    continue
+                if self.exceeds_pixel_budget(page_number):
+                    continue
+                tk_img = self.render_page(page_number)
+                self.render_cache.put(key, tk_img, tk_img.width() * tk_img.height() * 4)
+                self.metrics.incr('render.prefetched')
+                self.prefetch_job = self.after(50, self._prefetch_next)
+                return
+    
+    def on_memory_pressure(self, level, sample):
+        previous = self.quality
+        self.quality = dict(QUALITY_PROFILES[level])
+        evicted = self.render_cache.resize(self.quality['cache_entries'], self.quality['cache_bytes'])
+        if self.quality['prefetch_depth'] == 0:
+            self.cancel_prefetch()
+        
+        actions = []
+        if level == NORMAL:
+            actions.append("full quality restored")
+        else:
+            actions.append(f"render cache limited to {self.quality['cache_entries']} pages ({evicted} freed)")
+            if self.quality['prefetch_depth'] < previous['prefetch_depth']:
+                actions.append("prefetch off")
+            if self.quality['clip_to_viewport']:
+                actions.append("viewport-only rendering")
+            # Decoded images and fonts can be re-created, so give them back first
+            percent = 100 if self.quality['clip_to_viewport'] else 50
+            self.store_manager.shrink(percent, reason=f"memory pressure {level}")
+            actions.append(f"MuPDF store shrunk {percent}%")
+        
+        rss = sample.get('rss')
+        usage = f", {rss // (1024 * 1024)} MB in use" if rss is not None else ""
+        message = f"Memory pressure {level}{usage}: " + ", ".join(actions)
+        self.status_var.set(message)
+        self.metrics.event(message)
+        
+        if self.doc and previous['clip_to_viewport'] != self.quality['clip_to_viewport']:
+            self.update_page()
+    
     def next_page(self):
+        if self.remote_preview:
+            self.status_var.set("The remaining pages are still downloading")
+            return
         if self.doc and self.current_page < len(self.doc) - 1:
             self.current_page += 1
             self.update_page()
@@ -268,16 +770,258 @@ Coming soon:
 - PowerPoint Presentations (.pptx)"""
         
         messagebox.showinfo("About NathFile Reader", about_text)
+    
+    def show_library(self):
+        if getattr(self, 'library_window', None) and self.library_window.winfo_exists():
+            self.library_window.lift()
+            return
+        self.library_window = LibraryWindow(self, self.open_file)
+    
+    def show_compare(self):
+        if not self.doc or self.remote_preview:
+            messagebox.showinfo("Info", "Open the first document to compare before choosing the second.")
+            return
+        other = filedialog.askopenfilename(
+            title="Compare With",
+            filetypes=[("PDF Files", "*.pdf"), ("All Files", "*.*")]
+        )
+        if not other:
+            return
+        try:
+            # Loaded on first use so numpy is only needed by compare mode
+            from compare_view import CompareWindow
+            CompareWindow(self, self.doc.name, other, self.metrics, self.zoom, self.device_pixel_ratio())
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not compare documents: {str(e)}")
+    
+    def start_presentation(self):
+        if not self.doc or self.remote_preview:
+            return
+        if getattr(self, 'presentation_window', None) and self.presentation_window.winfo_exists():
+            return
+        self.cancel_prefetch()
+        self.presentation_window = PresentationWindow(
+            self, self.doc, self.current_page, self.metrics, self.profile, on_close=self.end_presentation)
+    
+    def end_presentation(self, page_number):
+        # Carry on reading where the talk stopped
+        self.presentation_window = None
+        self.current_page = page_number
+        self.update_page()
+        self.focus_force()
+    
+    def show_diagnostics(self):
+        if getattr(self, 'diagnostics_window', None) and self.diagnostics_window.winfo_exists():
+            self.diagnostics_window.lift()
+            self.refresh_diagnostics()
+            return
+        window = ctk.CTkToplevel(self)
+        window.title("MuPDF Diagnostics")
+        window.geometry("720x420")
+        buttons = ctk.CTkFrame(window)
+        buttons.pack(fill="x", padx=5, pady=5)
+        ctk.CTkButton(buttons, text="Profile Current Page", command=self.profile_current_page, width=150).pack(side="left", padx=2)
+        ctk.CTkButton(buttons, text="Empty Store", command=self.empty_mupdf_store, width=100).pack(side="left", padx=2)
+        ctk.CTkButton(buttons, text="Refresh", command=self.refresh_diagnostics, width=80).pack(side="left", padx=2)
+        self.diagnostics_text = ctk.CTkTextbox(window, font=("Consolas", 12), wrap="none")
+        self.diagnostics_text.pack(fill="both", expand=True, padx=5, pady=(0, 5))
+        self.diagnostics_window = window
+        self.refresh_diagnostics()
+    
+    def refresh_diagnostics(self):
+        self.diagnostics_text.configure(state="normal")
+        self.diagnostics_text.delete("1.0", "end")
+        self.diagnostics_text.insert("1.0", self.store_manager.report())
+        self.diagnostics_text.configure(state="disabled")
+    
+    def profile_current_page(self):
+        if not self.doc:
+            return
+        result = self.store_manager.profile_page(self.doc, self.current_page, self.scale)
+        self.status_var.set(f"Page {self.current_page + 1} is limited by {result['bound']}")
+        self.refresh_diagnostics()
+    
+    def empty_mupdf_store(self):
+        self.store_manager.shrink(100, reason="requested")
+        self.refresh_diagnostics()
+    
+    def show_metrics(self):
+        summary = self.metrics.summary() or "No metrics recorded yet."
+        messagebox.showinfo("Performance Metrics", summary)
+    
+    def set_profile(self, profile):
+        # Grayscale and night profiles are rendered natively by MuPDF with one byte per pixel for gray
+        self.profile = profile
+        self.profile_var.set(profile)
+        if self.current_file:
+            path = document_key(self.current_file)
+            if profile == COLOR:
+                self.document_profiles.pop(path, None)
+            else:
+                self.document_profiles[path] = profile
+        if self.doc:
+            self.update_page()
+    
+    def session_state(self):
+        if not self.doc or not self.current_file:
+            return {'files': [], 'profiles': self.document_profiles}
+        stat = os.stat(self.doc.name)
+        return {
+            'files': [{
+                'path': document_key(self.current_file),
+                'page': self.current_page,
+                'zoom': self.zoom,
+                'scroll': [self.canvas.xview()[0], self.canvas.yview()[0]],
+                'mtime': stat.st_mtime,
+                'size': stat.st_size,
+            }],
+            'active': 0,
+            'profiles': self.document_profiles,
+        }
+    
+    def schedule_session_save(self):
+        # Keep the session current so a crash loses at most the last second of navigation
+        if self.session_job:
+            self.after_cancel(self.session_job)
+        self.session_job = self.after(self.SESSION_SAVE_DELAY_MS, self._save_session_now)
+    
+    def _save_session_now(self):
+        self.session_job = None
+        try:
+            self.save_session(snapshot=False)
+        except Exception as e:
+            print(f"Could not save session: {str(e)}")
+    
+    def save_session(self, snapshot=True):
+        if self.session_job:
+            self.after_cancel(self.session_job)
+            self.session_job = None
+        state = self.session_state()
+        if state['files'] and snapshot:
+            try:
+                state['snapshot'] = self.save_snapshot()
+            except Exception as e:
+                print(f"Could not save viewport snapshot: {str(e)}")
+                self.session_store.clear_snapshot()
+        else:
+            # Only the exit save renders the viewport; an older snapshot would no longer match
+            self.session_store.clear_snapshot()
+        self.session_store.save(state)
+    
+    def save_snapshot(self):
+        # Render exactly what is on screen so the next launch can paint it before opening the document
+        page_rect = self.doc.load_page(self.current_page).rect
+        left = self.canvas.canvasx(0)
+        top = self.canvas.canvasy(0)
+        region = (
+            left,
+            top,
+            min(page_rect.width * self.scale, left + self.canvas.winfo_width()),
+            min(page_rect.height * self.scale, top + self.canvas.winfo_height()),
+        )
+        page = self.doc.load_page(self.current_page)
+        pix = render_pixmap(page, self.scale, self.page_clip(page_rect, region), self.profile)
+        apply_tone(pix, self.profile)
+        self.session_store.save_snapshot(pix.tobytes("png"))
+        return {
+            'x': int(left),
+            'y': int(top),
+            'width': int(page_rect.width * self.scale),
+            'height': int(page_rect.height * self.scale),
+        }
+    
+    def paint_snapshot(self, entry, snapshot):
+        # Show the last viewport immediately; it is replaced once the document has opened
+        try:
+            stat = os.stat(entry['path'])
+            if stat.st_mtime != entry.get('mtime') or stat.st_size != entry.get('size'):
+                return False
+            with self.metrics.timer('session.snapshot_paint'):
+                self.snapshot_img = tk.PhotoImage(file=str(self.session_store.snapshot_path))
+                self.canvas.config(scrollregion=(0, 0, snapshot['width'], snapshot['height']))
+                self.canvas.create_image(snapshot['x'], snapshot['y'], anchor="nw", image=self.snapshot_img)
+                self.canvas.xview_moveto(snapshot['x'] / max(snapshot['width'], 1))
+                self.canvas.yview_moveto(snapshot['y'] / max(snapshot['height'], 1))
+            self.title(f"NathFile Reader - {os.path.basename(entry['path'])}")
+            self.status_var.set(f"Restoring: {os.path.basename(entry['path'])}")
+            return True
+        except (OSError, KeyError, tk.TclError):
+            return False
+    
+    def restore_session(self):
+        state = self.session_store.load()
+        files = [f for f in state.get('files', []) if is_url(f.get('path')) or os.path.exists(f.get('path', ''))]
+        if not files:
+            return False
+        entry = files[min(state.get('active', 0), len(files) - 1)]
+        if state.get('snapshot'):
+            self.paint_snapshot(entry, state['snapshot'])
+        self.after(50, lambda: self.open_file(
+            entry['path'], entry.get('page', 0), entry.get('zoom', 1.0), entry.get('scroll')))
+        return True
+    
+    def start_instance_server(self):
+        self.instance_server = single_instance.InstanceServer(self.on_handoff)
+        try:
+            self.instance_server.start()
+        except OSError as e:
+            print(f"Single-instance server unavailable: {str(e)}")
+            self.instance_server = None
+            return
+        self._poll_instance_server()
+    
+    def _poll_instance_server(self):
+        if self.instance_server:
+            self.instance_server.poll()
+            self.after(100, self._poll_instance_server)
+    
+    def on_handoff(self, files):
+        # Another launch passed us its file; open it here with our warm caches
+        self.deiconify()
+        self.lift()
+        self.focus_force()
+        self.metrics.incr('instance.handoff')
+        if files:
+            self.open_file(files[-1])
+    
+    def on_closing(self):
+        self.close_search_worker()
+        self.remote = None
+        if getattr(self, 'instance_server', None):
+            self.instance_server.stop()
+            self.instance_server = None
+        try:
+            self.save_session()
+            self.session_store.save_settings(self.settings)
+        except Exception as e:
+            print(f"Could not save session: {str(e)}")
+        self.destroy()
 
 def main():
+    args = sys.argv[1:]
+    # Headless tile server for browser clients, also when started through the console script
+    if '--serve' in args:
+        import tile_server
+        return tile_server.main(args)
+    
     ctk.set_appearance_mode("System")  # Modes: "System" (standard), "Dark", "Light"
     ctk.set_default_color_theme("blue")  # Themes: "blue" (standard), "green", "dark-blue"
     
+    # Script launches already tried the hand-off at import time
+    if __name__ != "__main__" and single_instance.hand_off(args):
+        return
+    
     app = NathFileReader()
+    app.protocol("WM_DELETE_WINDOW", app.on_closing)
+    app.start_instance_server()
     
-    # Try to open test PDF if it exists
+    # Open a file passed on the command line (file associations pass "%1"),
+    # otherwise restore the last session or try to open test PDF if it exists
+    files = [a for a in args if not a.startswith('--')]
     test_pdf = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_document.pdf")
-    if os.path.exists(test_pdf):
+    if files:
+        app.after(50, lambda: app.open_file(document_key(files[-1])))
+    elif not app.restore_session() and os.path.exists(test_pdf):
         app.after(100, lambda: app.open_file(test_pdf))
     
     app.mainloop()
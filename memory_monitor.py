@@ -0,0 +1,178 @@
+import os
+import sys
+import ctypes
+
+MB = 1024 * 1024
+
+NORMAL = 'normal'
+ELEVATED = 'elevated'
+CRITICAL = 'critical'
+
+LEVELS = [NORMAL, ELEVATED, CRITICAL]
+
+# How the viewer degrades at each pressure level
+QUALITY_PROFILES = {
+    NORMAL: {'cache_entries': 8, 'cache_bytes': 256 * MB, 'prefetch_depth': 1, 'clip_to_viewport': False},
+    ELEVATED: {'cache_entries': 2, 'cache_bytes': 64 * MB, 'prefetch_depth': 0, 'clip_to_viewport': False},
+    CRITICAL: {'cache_entries': 0, 'cache_bytes': 0, 'prefetch_depth': 0, 'clip_to_viewport': True},
+}
+
+
+if sys.platform == 'win32':
+    from ctypes import wintypes
+
+    class _MemoryStatusEx(ctypes.Structure):
+        _fields_ = [
+            ('dwLength', wintypes.DWORD),
+            ('dwMemoryLoad', wintypes.DWORD),
+            ('ullTotalPhys', ctypes.c_ulonglong),
+            ('ullAvailPhys', ctypes.c_ulonglong),
+            ('ullTotalPageFile', ctypes.c_ulonglong),
+            ('ullAvailPageFile', ctypes.c_ulonglong),
+            ('ullTotalVirtual', ctypes.c_ulonglong),
+            ('ullAvailVirtual', ctypes.c_ulonglong),
+            ('ullAvailExtendedVirtual', ctypes.c_ulonglong),
+        ]
+
+    class _ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [
+            ('cb', wintypes.DWORD),
+            ('PageFaultCount', wintypes.DWORD),
+            ('PeakWorkingSetSize', ctypes.c_size_t),
+            ('WorkingSetSize', ctypes.c_size_t),
+            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+            ('PagefileUsage', ctypes.c_size_t),
+            ('PeakPagefileUsage', ctypes.c_size_t),
+        ]
+
+
+def get_process_rss():
+    """Resident set size of this process in bytes, or None if unavailable."""
+    try:
+        if sys.platform == 'win32':
+            counters = _ProcessMemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+            return None
+        if os.path.exists('/proc/self/status'):
+            with open('/proc/self/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1]) * 1024
+        # getrusage only reports the peak, which never falls and would hold the viewer at a degraded level
+        return None
+    except Exception:
+        return None
+
+
+def get_system_memory():
+    """(available, total) physical memory in bytes, or (None, None) if unavailable."""
+    try:
+        if sys.platform == 'win32':
+            status = _MemoryStatusEx()
+            status.dwLength = ctypes.sizeof(status)
+            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+                return status.ullAvailPhys, status.ullTotalPhys
+            return None, None
+        if os.path.exists('/proc/meminfo'):
+            info = {}
+            with open('/proc/meminfo') as f:
+                for line in f:
+                    key, value = line.split(':', 1)
+                    info[key] = int(value.split()[0]) * 1024
+            return info.get('MemAvailable', info.get('MemFree')), info.get('MemTotal')
+        page_size = os.sysconf('SC_PAGE_SIZE')
+        return os.sysconf('SC_AVPHYS_PAGES') * page_size, os.sysconf('SC_PHYS_PAGES') * page_size
+    except Exception:
+        return None, None
+
+
+class MemoryMonitor:
+    """Periodically samples process RSS and system available memory on the Tk event loop.
+
+    ``on_change(level, sample)`` is called whenever the pressure level changes.
+    Levels only drop back once usage is comfortably below the threshold that
+    raised them, so the viewer does not flip between qualities on every sample.
+    """
+
+    def __init__(self, root, on_change, metrics=None, interval_ms=2000,
+                 rss_elevated=1536 * MB, rss_critical=2560 * MB,
+                 available_elevated=0.15, available_critical=0.07, hysteresis=1.25):
+        self.root = root
+        self.on_change = on_change
+        self.metrics = metrics
+        self.interval_ms = interval_ms
+        self.rss_elevated = rss_elevated
+        self.rss_critical = rss_critical
+        self.available_elevated = available_elevated
+        self.available_critical = available_critical
+        self.hysteresis = hysteresis
+        self.level = NORMAL
+        self.last_sample = None
+        self._job = None
+
+    def start(self):
+        if self._job is None:
+            self._job = self.root.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+    def sample(self):
+        rss = get_process_rss()
+        available, total = get_system_memory()
+        self.last_sample = {'rss': rss, 'available': available, 'total': total}
+        if self.metrics:
+            if rss is not None:
+                self.metrics.gauge('memory.rss_mb', rss // MB)
+            if available is not None:
+                self.metrics.gauge('memory.available_mb', available // MB)
+        return self.last_sample
+
+    def classify(self, sample, current=NORMAL):
+        rss = sample.get('rss')
+        available = sample.get('available')
+        total = sample.get('total')
+        available_ratio = available / total if available is not None and total else None
+
+        def exceeds(rss_limit, ratio_limit, margin):
+            if rss is not None and rss * margin > rss_limit:
+                return True
+            if available_ratio is not None and available_ratio < ratio_limit * margin:
+                return True
+            return False
+
+        # Staying at the current level needs only the raw threshold; leaving it needs the margin
+        critical_margin = self.hysteresis if current == CRITICAL else 1.0
+        if exceeds(self.rss_critical, self.available_critical, critical_margin):
+            return CRITICAL
+        elevated_margin = self.hysteresis if current in (ELEVATED, CRITICAL) else 1.0
+        if exceeds(self.rss_elevated, self.available_elevated, elevated_margin):
+            return ELEVATED
+        return NORMAL
+
+    def check(self):
+        sample = self.sample()
+        level = self.classify(sample, self.level)
+        if level != self.level:
+            previous = self.level
+            self.level = level
+            if self.metrics:
+                self.metrics.incr(f'memory.pressure.{level}')
+                self.metrics.event(f"Memory pressure {previous} -> {level}")
+            self.on_change(level, sample)
+        return level
+
+    def _tick(self):
+        self._job = None
+        try:
+            self.check()
+        finally:
+            self._job = self.root.after(self.interval_ms, self._tick)
@@ -0,0 +1,75 @@
+import time
+import threading
+from collections import deque
+
+
+class Metrics:
+    """Counters, timings and a short event log shared by the viewer components."""
+
+    def __init__(self, max_events=100):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.timings = {}
+        self.events = deque(maxlen=max_events)
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def gauge(self, name, value):
+        with self._lock:
+            self.gauges[name] = value
+
+    def record(self, name, seconds):
+        with self._lock:
+            stats = self.timings.setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0, 'last': 0.0})
+            stats['count'] += 1
+            stats['total'] += seconds
+            stats['max'] = max(stats['max'], seconds)
+            stats['last'] = seconds
+
+    def timer(self, name):
+        return _Timer(self, name)
+
+    def event(self, message):
+        with self._lock:
+            self.events.append((time.time(), message))
+
+    def summary(self):
+        with self._lock:
+            lines = []
+            for name in sorted(self.counters):
+                lines.append(f"{name}: {self.counters[name]}")
+            for name in sorted(self.gauges):
+                lines.append(f"{name}: {self.gauges[name]}")
+            for name in sorted(self.timings):
+                stats = self.timings[name]
+                avg = stats['total'] / stats['count'] if stats['count'] else 0.0
+                lines.append(
+                    f"{name}: n={stats['count']} avg={avg * 1000:.1f}ms "
+                    f"max={stats['max'] * 1000:.1f}ms last={stats['last'] * 1000:.1f}ms"
+                )
+            if self.events:
+                lines.append("")
+                lines.append("Recent events:")
+                for stamp, message in list(self.events)[-10:]:
+                    lines.append(f"  {time.strftime('%H:%M:%S', time.localtime(stamp))} {message}")
+            return "\n".join(lines)
+
+
+class _Timer:
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.start = None
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed = time.perf_counter() - self.start
+        self.metrics.record(self.name, self.elapsed)
+        return False
@@ -1,11 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, font as tkfont
-from PIL import Image, ImageTk, ImageEnhance
+from PIL import ImageTk
 import fitz  # PyMuPDF
-import io
 import os
 from pathlib import Path
 import json
+from rendering import render_image, COLOR, GRAYSCALE, NIGHT, NIGHT_GRAY
 
 class ModernPDFViewer:
     def __init__(self, root):
@@ -49,6 +49,7 @@ class ModernPDFViewer:
         
         # Initialize variables
         self.doc = None
+        self.doc_path = None
         self.current_page = 0
         self.zoom = 1.0
         self.images = []
@@ -61,6 +62,7 @@ class ModernPDFViewer:
         self.root.bind("<Control-plus>", lambda e: self.change_zoom(1.25))
         self.root.bind("<Control-minus>", lambda e: self.change_zoom(0.8))
         self.root.bind("<Control-n>", lambda e: self.toggle_night_mode())
+        self.root.bind("<Control-g>", lambda e: self.toggle_grayscale())
         
         # Try to open test PDF if it exists
         self.after_id = self.root.after(100, self.try_open_test_pdf)
@@ -95,6 +97,7 @@ class ModernPDFViewer:
         self.btn_zoom_in = tk.Button(self.toolbar, text="Zoom In", command=lambda: self.change_zoom(1.25), **btn_style)
         self.btn_zoom_out = tk.Button(self.toolbar, text="Zoom Out", command=lambda: self.change_zoom(0.8), **btn_style)
         self.btn_night = tk.Button(self.toolbar, text="Night Mode", command=self.toggle_night_mode, **btn_style)
+        self.btn_gray = tk.Button(self.toolbar, text="Grayscale", command=self.toggle_grayscale, **btn_style)
         
         # Brightness slider
         self.brightness_frame = tk.Frame(self.toolbar, bg=self.get_color('toolbar'))
@@ -120,6 +123,7 @@ class ModernPDFViewer:
         self.btn_zoom_in.pack(side=tk.LEFT, padx=2)
         self.btn_zoom_out.pack(side=tk.LEFT, padx=2)
         self.btn_night.pack(side=tk.LEFT, padx=2)
+        self.btn_gray.pack(side=tk.LEFT, padx=2)
         
         # Pack brightness controls
         self.brightness_frame.pack(side=tk.LEFT, padx=10)
@@ -168,7 +172,7 @@ class ModernPDFViewer:
         self.canvas.bind("<Button-5>", lambda e: self.on_mousewheel(e, delta=-120))  # Linux down
         
         # Bind mouse motion for hover effects
-        for btn in [self.btn_open, self.btn_prev, self.btn_next, self.btn_zoom_in, self.btn_zoom_out, self.btn_night]:
+        for btn in [self.btn_open, self.btn_prev, self.btn_next, self.btn_zoom_in, self.btn_zoom_out, self.btn_night, self.btn_gray]:
             btn.bind("<Enter>", lambda e, b=btn: self.on_enter(e, b))
             btn.bind("<Leave>", lambda e, b=btn: self.on_leave(e, b))
             btn.bind("<ButtonPress-1>", lambda e, b=btn: self.on_press(e, b))
@@ -186,7 +190,7 @@ class ModernPDFViewer:
         self.brightness_slider.config(bg=self.get_color('toolbar'), fg=self.get_color('fg'))
         
         # Update button styles
-        for btn in [self.btn_open, self.btn_prev, self.btn_next, self.btn_zoom_in, self.btn_zoom_out, self.btn_night]:
+        for btn in [self.btn_open, self.btn_prev, self.btn_next, self.btn_zoom_in, self.btn_zoom_out, self.btn_night, self.btn_gray]:
             btn.config(
                 bg=self.get_color('button'),
                 fg=self.get_color('fg'),
@@ -255,6 +259,7 @@ class ModernPDFViewer:
         
         # Open the PDF
         self.doc = fitz.open(filepath)
+        self.doc_path = os.path.abspath(filepath)
         self.current_page = 0
         self.zoom = 1.0
         self.show_page()
@@ -267,30 +272,12 @@ class ModernPDFViewer:
             # Get the page
             page = self.doc.load_page(self.current_page)
             
-            # Render page to an image
-            zoom_matrix = fitz.Matrix(self.zoom, self.zoom)
-            pix = page.get_pixmap(matrix=zoom_matrix)
-            
-            # Convert to ImageTk format
-            img_data = pix.tobytes("ppm")
-            img = Image.open(io.BytesIO(img_data))
-            
-            # Apply brightness
-            enhancer = ImageEnhance.Brightness(img)
-            img = enhancer.enhance(self.brightness)
-            
-            # Apply night mode effect if needed
-            if self.theme == 'dark':
-                # Invert colors for dark mode
-                img = Image.eval(img, lambda x: 255 - x)
-                # Reduce brightness for eye comfort
-                enhancer = ImageEnhance.Brightness(img)
-                img = enhancer.enhance(0.7)
-            
+            # Render page to an image; MuPDF applies grayscale, brightness and night inversion itself
+            img = render_image(page, self.zoom, profile=self.render_profile(), brightness=self.brightness)
             self.current_image = ImageTk.PhotoImage(image=img)
             
-            # Keep a reference to the image
-            self.images.append(self.current_image)
+            # Keep a reference to the displayed image only
+            self.images = [self.current_image]
             
             # Clear canvas and update
             self.canvas.delete("all")
@@ -346,6 +333,23 @@ class ModernPDFViewer:
         except ValueError:
             pass
     
+    def render_profile(self):
+        gray = self.doc_path in self.settings.get('grayscale_documents', [])
+        if self.theme == 'dark':
+            return NIGHT_GRAY if gray else NIGHT
+        return GRAYSCALE if gray else COLOR
+    
+    def toggle_grayscale(self):
+        # Remembered per document; monochrome scans need a third of the bitmap memory in grayscale
+        if not self.doc_path:
+            return
+        documents = self.settings.setdefault('grayscale_documents', [])
+        if self.doc_path in documents:
+            documents.remove(self.doc_path)
+        else:
+            documents.append(self.doc_path)
+        self.show_page()
+    
     def toggle_night_mode(self):
         self.theme = 'dark' if self.theme == 'light' else 'light'
         self.update_theme()
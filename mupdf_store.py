@@ -0,0 +1,164 @@
+import re
+import math
+import time
+
+import fitz  # PyMuPDF
+
+MB = 1024 * 1024
+
+
+def _tools_value(name):
+    # Older PyMuPDF exposes these as int properties, newer builds as methods that may return None
+    value = getattr(fitz.TOOLS, name, None)
+    if callable(value):
+        value = value()
+    return value if isinstance(value, int) else None
+
+
+def _debug_store_totals():
+    """(size, max) of the store from MuPDF's own store dump, or None without the low-level bindings.
+
+    Rebased PyMuPDF builds return None from TOOLS.store_size/store_maxsize;
+    fz_debug_store ends with a "max=..., size=..." line that has both.
+    """
+    mupdf = getattr(fitz, 'mupdf', None)
+    if mupdf is None or not hasattr(mupdf, 'fz_debug_store'):
+        return None
+    try:
+        buffer = mupdf.FzBuffer(4096)
+        out = mupdf.FzOutput(buffer)
+        mupdf.fz_debug_store(out)
+        out.fz_close_output()
+        text = buffer.fz_buffer_extract().decode('utf-8', 'replace')
+    except Exception:
+        return None
+    match = re.search(r'max=(\d+), size=(\d+)', text)
+    return (int(match.group(2)), int(match.group(1))) if match else None
+
+
+def store_size():
+    size = _tools_value('store_size')
+    if size is None:
+        totals = _debug_store_totals()
+        size = totals[0] if totals else None
+    return size
+
+
+def store_maxsize():
+    maxsize = _tools_value('store_maxsize')
+    if maxsize is None:
+        totals = _debug_store_totals()
+        maxsize = totals[1] if totals else None
+    return maxsize
+
+
+def classify_bound(decode, cold, warm):
+    """What limits a page: decoding resources (images, fonts) or rasterizing the display list."""
+    return 'resource decoding' if max(decode, cold - warm) > warm else 'rasterization'
+
+
+class StoreManager:
+    """Keeps MuPDF's resource store (decoded images, fonts, parsed objects) within a budget.
+
+    MuPDF fixes the store limit when its context is created, so the budget is
+    enforced by shrinking the store after renders once it grows past it.
+    Explicit shrinks and evictions MuPDF made on its own (the store got smaller
+    between two samples without us shrinking it) are counted in the metrics.
+    """
+
+    def __init__(self, metrics, budget_mb=None):
+        self.metrics = metrics
+        self.budget = budget_mb * MB if budget_mb else None
+        self.last_size = None
+        self.page_profiles = []
+
+    def sample(self):
+        size = store_size()
+        if size is not None:
+            if self.last_size is not None and size < self.last_size:
+                self.metrics.incr('mupdf.store_evictions')
+            self.last_size = size
+            self.metrics.gauge('mupdf.store_mb', round(size / MB, 1))
+        maxsize = store_maxsize()
+        if maxsize is not None:
+            self.metrics.gauge('mupdf.store_max_mb', round(maxsize / MB, 1))
+        return size
+
+    def enforce_budget(self):
+        size = self.sample()
+        if self.budget and size and size > self.budget:
+            self.shrink(math.ceil((size - self.budget) * 100 / size), reason="over budget")
+
+    def shrink(self, percent, reason=""):
+        fitz.TOOLS.store_shrink(percent)
+        self.metrics.incr('mupdf.store_shrinks')
+        self.metrics.event(f"MuPDF store shrunk by {percent}%" + (f" ({reason})" if reason else ""))
+        self.last_size = store_size()
+
+    def profile_page(self, doc, page_number, scale):
+        """Split a page's render time into interpretation, image decoding and rasterization.
+
+        The page is rasterized once with an empty store (decoding everything)
+        and once warm; the difference is what the store saves on a revisit.
+        """
+        page = doc.load_page(page_number)
+        matrix = fitz.Matrix(scale, scale)
+
+        start = time.perf_counter()
+        display_list = page.get_displaylist()
+        interpret = time.perf_counter() - start
+
+        decode = 0.0
+        images = page.get_images(full=True)
+        for image in images:
+            start = time.perf_counter()
+            try:
+                fitz.Pixmap(doc, image[0])
+            except Exception:
+                continue
+            decode += time.perf_counter() - start
+
+        self.shrink(100, reason="page profile")
+        start = time.perf_counter()
+        display_list.get_pixmap(matrix=matrix, alpha=False)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        display_list.get_pixmap(matrix=matrix, alpha=False)
+        warm = time.perf_counter() - start
+
+        self.metrics.record('page.interpret', interpret)
+        self.metrics.record('page.decode', decode)
+        self.metrics.record('page.rasterize', warm)
+        result = {
+            'page': page_number,
+            'images': len(images),
+            'interpret': interpret,
+            'decode': decode,
+            'rasterize_cold': cold,
+            'rasterize_warm': warm,
+            'bound': classify_bound(decode, cold, warm),
+        }
+        self.page_profiles.append(result)
+        self.sample()
+        return result
+
+    def report(self):
+        size = self.sample()
+        maxsize = store_maxsize()
+        lines = [
+            f"Store in use: {size / MB:.1f} MB" if size is not None else "Store in use: not reported by this PyMuPDF build",
+            f"Store limit: {maxsize / MB:.1f} MB" if maxsize is not None else "Store limit: MuPDF default",
+            f"Budget: {self.budget // MB} MB" if self.budget else "Budget: none",
+            f"Shrinks: {self.metrics.counters.get('mupdf.store_shrinks', 0)}",
+            f"Evictions seen: {self.metrics.counters.get('mupdf.store_evictions', 0)}",
+        ]
+        if self.page_profiles:
+            lines.append("")
+            lines.append("Page  Images  Interpret  Img decode  Raster(cold)  Raster(warm)  Limited by")
+            for p in self.page_profiles[-20:]:
+                lines.append(
+                    f"{p['page'] + 1:>4}  {p['images']:>6}  {p['interpret'] * 1000:>7.1f}ms  "
+                    f"{p['decode'] * 1000:>9.1f}ms  {p['rasterize_cold'] * 1000:>10.1f}ms  "
+                    f"{p['rasterize_warm'] * 1000:>10.1f}ms  {p['bound']}"
+                )
+        return "\n".join(lines)
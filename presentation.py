@@ -0,0 +1,118 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+from rendering import render_image, COLOR
+
+
+def fit_scale(page_rect, width, height):
+    """Scale at which the page just fits a width x height pixel screen."""
+    return min(width / page_rect.width, height / page_rect.height)
+
+
+class FrameRing:
+    """Fixed ring of slide frames; page n lives in slot n % capacity.
+
+    With three slots the previous, current and next slides never evict each
+    other. Frames are tagged with the screen size they were rendered for.
+    """
+
+    def __init__(self, capacity=3):
+        self.capacity = capacity
+        self.slots = [None] * capacity
+
+    def get(self, page_number, size):
+        slot = self.slots[page_number % self.capacity]
+        if slot and slot[0] == page_number and slot[1] == size:
+            return slot[2]
+        return None
+
+    def put(self, page_number, size, frame):
+        self.slots[page_number % self.capacity] = (page_number, size, frame)
+
+    def __contains__(self, key):
+        return self.get(*key) is not None
+
+    def clear(self):
+        self.slots = [None] * self.capacity
+
+
+class EventClock:
+    """Maps Tk event timestamps (milliseconds from an unknown epoch) onto ``time.perf_counter``.
+
+    The offset between the two clocks is taken from the least delayed event
+    seen so far, so a handler that runs late still knows when its input
+    arrived. A jump of more than a minute (the 32-bit timestamp wrapping)
+    starts the estimate again.
+    """
+
+    def __init__(self):
+        self.offset = None
+
+    def arrival(self, event_time, now=None):
+        now = time.perf_counter() if now is None else now
+        offset = now - event_time / 1000.0
+        if self.offset is None or offset < self.offset or offset - self.offset > 60:
+            self.offset = offset
+        return event_time / 1000.0 + self.offset
+
+
+def render_slide(doc, page_number, size, profile=COLOR):
+    page = doc.load_page(page_number)
+    return render_image(page, fit_scale(page.rect, *size), profile=profile)
+
+
+# The pre-render process keeps its own handle on the presented file
+_document = None
+
+
+def _open_document(path):
+    global _document
+    _document = fitz.open(path)
+
+
+def _render_job(page_number, size, profile):
+    img = render_slide(_document, page_number, size, profile)
+    return img.mode, img.size, img.tobytes()
+
+
+class SlideRenderer:
+    """Renders slides fitted to the screen on a worker process.
+
+    PyMuPDF holds the GIL while it renders, so a render on a thread would
+    still stall key presses; the worker sends back raw samples instead.
+    ``poll`` returns finished slides as ``(page_number, size, image)``;
+    requests for pages no longer in ``wanted`` are cancelled or dropped.
+    """
+
+    def __init__(self, path, profile=COLOR):
+        self.profile = profile
+        self.executor = ProcessPoolExecutor(max_workers=1, initializer=_open_document, initargs=(path,))
+        self.pending = {}
+        self.wanted = set()
+
+    def request(self, page_number, size):
+        if (page_number, size) not in self.pending:
+            self.pending[(page_number, size)] = self.executor.submit(_render_job, page_number, size, self.profile)
+
+    def poll(self):
+        finished = []
+        for key, future in list(self.pending.items()):
+            if key[0] not in self.wanted and future.cancel():
+                del self.pending[key]
+            elif future.done():
+                del self.pending[key]
+                try:
+                    mode, image_size, samples = future.result()
+                except Exception:
+                    continue
+                if key[0] in self.wanted:
+                    finished.append((key[0], key[1], Image.frombytes(mode, image_size, samples)))
+        return finished
+
+    def close(self):
+        self.wanted = set()
+        self.pending = {}
+        self.executor.shutdown(wait=False, cancel_futures=True)
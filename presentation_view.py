@@ -0,0 +1,87 @@
+import time
+import tkinter as tk
+from PIL import ImageTk
+
+from presentation import FrameRing, SlideRenderer, EventClock, render_slide
+from rendering import COLOR
+
+
+class PresentationWindow(tk.Toplevel):
+    """Full-screen slideshow; neighbouring slides are pre-rendered so advancing only swaps bitmaps."""
+
+    def __init__(self, master, doc, page_number, metrics, profile=COLOR, on_close=None):
+        super().__init__(master, bg='black')
+        self.doc = doc
+        self.metrics = metrics
+        self.profile = profile
+        self.on_close = on_close
+        self.attributes('-fullscreen', True)
+        self.size = (self.winfo_screenwidth(), self.winfo_screenheight())
+        self.current_page = page_number
+        self.ring = FrameRing(3)
+        self.clock = EventClock()
+        self.poll_job = None
+
+        self.canvas = tk.Canvas(self, bg='black', highlightthickness=0, cursor='none')
+        self.canvas.pack(fill="both", expand=True)
+        self.image_item = self.canvas.create_image(self.size[0] // 2, self.size[1] // 2, anchor="center")
+
+        self.renderer = SlideRenderer(doc.name, profile)
+
+        for key in ("<Right>", "<Down>", "<Next>", "<space>", "<Return>", "<Button-1>"):
+            self.bind(key, lambda e: self.show(self.current_page + 1, event=e))
+        for key in ("<Left>", "<Up>", "<Prior>", "<BackSpace>", "<Button-3>"):
+            self.bind(key, lambda e: self.show(self.current_page - 1, event=e))
+        self.bind("<Home>", lambda e: self.show(0, event=e))
+        self.bind("<End>", lambda e: self.show(len(self.doc) - 1, event=e))
+        self.bind("<Escape>", lambda e: self.close())
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.focus_force()
+
+        self.show(page_number, force=True)
+        self._poll()
+
+    def show(self, page_number, force=False, event=None):
+        if not 0 <= page_number < len(self.doc) or (page_number == self.current_page and not force):
+            return
+        # Time the swap from when the input arrived, so any wait before this handler ran is included
+        started = self.clock.arrival(event.time) if event is not None and event.time else time.perf_counter()
+        frame = self.ring.get(page_number, self.size)
+        if frame is None:
+            # Jumped past the pre-rendered slides; render this one now
+            self.metrics.incr('presentation.frame_miss')
+            with self.metrics.timer('presentation.render'):
+                frame = ImageTk.PhotoImage(render_slide(self.doc, page_number, self.size, self.profile))
+            self.ring.put(page_number, self.size, frame)
+        else:
+            self.metrics.incr('presentation.frame_hit')
+        self.canvas.itemconfigure(self.image_item, image=frame)
+        self.current_page = page_number
+        self.update_idletasks()
+        self.metrics.record('presentation.frame_swap', time.perf_counter() - started)
+        self.prerender_neighbours()
+
+    def prerender_neighbours(self):
+        neighbours = {p for p in (self.current_page + 1, self.current_page - 1) if 0 <= p < len(self.doc)}
+        self.renderer.wanted = neighbours
+        # The next slide first: it is the one most likely to be shown
+        for page_number in sorted(neighbours, reverse=True):
+            if (page_number, self.size) not in self.ring:
+                self.renderer.request(page_number, self.size)
+
+    def _poll(self):
+        for page_number, size, image in self.renderer.poll():
+            # Converting to a Tk image has to happen on this thread; it is done ahead of the swap
+            if size == self.size and (page_number, size) not in self.ring:
+                self.ring.put(page_number, size, ImageTk.PhotoImage(image))
+        self.poll_job = self.after(15, self._poll)
+
+    def close(self):
+        if self.poll_job:
+            self.after_cancel(self.poll_job)
+            self.poll_job = None
+        self.renderer.close()
+        self.ring.clear()
+        self.destroy()
+        if self.on_close:
+            self.on_close(self.current_page)
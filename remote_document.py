@@ -0,0 +1,233 @@
+import os
+import re
+import json
+import hashlib
+import threading
+import urllib.request
+
+import fitz  # PyMuPDF
+
+from session_store import default_state_dir, atomic_write
+
+CHUNK_SIZE = 64 * 1024
+# Most chunks fetched with a single range request when filling gaps
+MAX_CHUNKS_PER_REQUEST = 64
+# Bytes before the main xref fetched for the page tree and other document-level objects
+TAIL_WINDOW = 256 * 1024
+
+
+def is_url(path):
+    return isinstance(path, str) and path.lower().startswith(('http://', 'https://'))
+
+
+def read_linearization(head):
+    """The linearization parameters (/L, /E, /T, /N, /O) from the start of a PDF, or None."""
+    match = re.search(rb'<<\s*/Linearized\s.*?>>', head, re.S)
+    if not match:
+        return None
+    params = {}
+    for key in ('L', 'E', 'T', 'N', 'O'):
+        value = re.search(rb'/' + key.encode() + rb'\s+(\d+)', match.group(0))
+        if not value:
+            return None
+        params[key] = int(value.group(1))
+    return params
+
+
+class RangeFile:
+    """Sparse local copy of a remote file, filled on demand with HTTP range requests.
+
+    Chunks already fetched are recorded next to the copy, so a document that
+    was partly or fully downloaded before is not fetched again as long as the
+    server reports the same length and ETag/Last-Modified.
+    """
+
+    def __init__(self, url, cache_dir=None, chunk_size=CHUNK_SIZE, timeout=30):
+        self.url = url
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        cache_dir = cache_dir or default_state_dir() / 'remote'
+        os.makedirs(cache_dir, exist_ok=True)
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        self.path = os.path.join(cache_dir, key + '.pdf')
+        self.index_path = os.path.join(cache_dir, key + '.json')
+        self.length = None
+        self.validator = None
+        self.chunks = set()
+        self.bytes_fetched = 0
+        self.lock = threading.Lock()
+
+    @property
+    def chunk_count(self):
+        return (self.length + self.chunk_size - 1) // self.chunk_size
+
+    @property
+    def complete(self):
+        return self.length is not None and len(self.chunks) == self.chunk_count
+
+    def open(self):
+        # The first chunk doubles as the probe for length, validators and range support
+        response = self._request(0, self.chunk_size - 1)
+        with response:
+            data = response.read()
+            validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+            if response.status == 206:
+                total = response.headers.get('Content-Range', '').rsplit('/', 1)[-1]
+                length = int(total) if total.isdigit() else None
+            else:
+                length = len(data)
+        if length is None:
+            raise IOError(f"Server did not report the size of {self.url}")
+
+        self._load_index(length, validator)
+        if not os.path.exists(self.path) or os.path.getsize(self.path) != length:
+            with open(self.path, 'wb') as f:
+                f.truncate(length)
+            self.chunks = set()
+        self._store(0, data)
+
+    def has(self, start, end):
+        first, last = start // self.chunk_size, (max(end, start + 1) - 1) // self.chunk_size
+        return all(i in self.chunks for i in range(first, last + 1))
+
+    def ensure(self, start, end):
+        """Make sure bytes [start, end) are present locally, fetching missing chunks."""
+        end = min(end, self.length)
+        if start >= end:
+            return
+        first, last = start // self.chunk_size, (end - 1) // self.chunk_size
+        self.fetch_chunks([i for i in range(first, last + 1) if i not in self.chunks])
+
+    def missing(self):
+        return [i for i in range(self.chunk_count) if i not in self.chunks]
+
+    def read(self, start, size):
+        self.ensure(start, start + size)
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            return f.read(size)
+
+    def fetch_chunks(self, chunks):
+        # Coalesce neighbouring missing chunks into one request
+        run = []
+        for index in chunks + [None]:
+            if run and (index != run[-1] + 1 or len(run) >= MAX_CHUNKS_PER_REQUEST):
+                start = run[0] * self.chunk_size
+                end = min((run[-1] + 1) * self.chunk_size, self.length) - 1
+                with self._request(start, end) as response:
+                    data = response.read()
+                    if response.status != 206:
+                        data = data[start:end + 1]
+                self._store(start, data)
+                run = []
+            if index is not None:
+                run.append(index)
+
+    def _request(self, start, end):
+        request = urllib.request.Request(self.url, headers={'Range': f'bytes={start}-{end}'})
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    def _store(self, start, data):
+        with self.lock:
+            with open(self.path, 'r+b') as f:
+                f.seek(start)
+                f.write(data)
+            self.bytes_fetched += len(data)
+            end = start + len(data)
+            first = start // self.chunk_size
+            for index in range(first, (end + self.chunk_size - 1) // self.chunk_size):
+                if (index + 1) * self.chunk_size <= end or end == self.length:
+                    self.chunks.add(index)
+            self._save_index()
+
+    def _load_index(self, length, validator):
+        self.length = length
+        self.validator = validator
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+            if validator and index.get('length') == length and index.get('validator') == validator:
+                self.chunks = set(index.get('chunks', []))
+        except (OSError, ValueError):
+            self.chunks = set()
+
+    def _save_index(self):
+        atomic_write(self.index_path, json.dumps({
+            'url': self.url,
+            'length': self.length,
+            'validator': self.validator,
+            'chunk_size': self.chunk_size,
+            'chunks': sorted(self.chunks),
+        }).encode('utf-8'))
+
+
+class RemoteDocument:
+    """Downloads a PDF over HTTP so its first page can be shown before the whole file arrives.
+
+    For linearized PDFs the first-page section plus the cross-reference data
+    at the end of the file is enough for MuPDF to open the document and draw
+    page 1. Everything else is fetched in the background.
+    """
+
+    def __init__(self, url, cache_dir=None, chunk_size=CHUNK_SIZE, tail_window=TAIL_WINDOW):
+        self.url = url
+        self.file = RangeFile(url, cache_dir, chunk_size)
+        self.tail_window = tail_window
+        self.linearization = None
+
+    @property
+    def path(self):
+        return self.file.path
+
+    @property
+    def complete(self):
+        return self.file.complete
+
+    def fetch_first_page(self):
+        """Fetch what page 1 needs. Returns True if a preview can be attempted."""
+        self.file.open()
+        if self.file.complete:
+            return True
+        self.linearization = read_linearization(self.file.read(0, 1024))
+        lin = self.linearization
+        if not lin or lin['L'] != self.file.length:
+            return False
+        self.file.ensure(0, lin['E'])
+        self.file.ensure(max(0, lin['T'] - self.tail_window), self.file.length)
+        return True
+
+    def open_preview(self):
+        """Open the partial copy; None unless MuPDF sees every page and can load page 1.
+
+        Gaps in the file make MuPDF repair the cross-reference table in memory,
+        which is harmless here because the complete file is reopened later.
+        """
+        if self.file.complete:
+            return fitz.open(self.path)
+        display_errors = getattr(fitz.TOOLS, 'mupdf_display_errors', None)
+        if display_errors:
+            display_errors(False)
+        try:
+            doc = fitz.open(self.path)
+            if self.linearization and doc.page_count == self.linearization['N']:
+                doc.load_page(0).bound()
+                return doc
+            doc.close()
+        except Exception:
+            pass
+        finally:
+            fitz.TOOLS.mupdf_warnings(reset=True)
+            if display_errors:
+                display_errors(True)
+        return None
+
+    def download_rest(self, progress=None, cancelled=None):
+        missing = self.file.missing()
+        total = len(missing)
+        for offset in range(0, total, MAX_CHUNKS_PER_REQUEST):
+            if cancelled and cancelled():
+                return False
+            self.file.fetch_chunks(missing[offset:offset + MAX_CHUNKS_PER_REQUEST])
+            if progress:
+                progress(min(offset + MAX_CHUNKS_PER_REQUEST, total), total)
+        return True
@@ -0,0 +1,60 @@
+from collections import OrderedDict
+
+
+class RenderCache:
+    """Least-recently-used store of rendered pages bounded by entry count and bytes."""
+
+    def __init__(self, max_entries=8, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, value, nbytes):
+        if key in self.entries:
+            self.bytes -= self.entries.pop(key)[1]
+        if self.max_entries <= 0 or nbytes > self.max_bytes:
+            return
+        self.entries[key] = (value, nbytes)
+        self.bytes += nbytes
+        self._evict()
+
+    def resize(self, max_entries=None, max_bytes=None):
+        if max_entries is not None:
+            self.max_entries = max_entries
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+        return self._evict()
+
+    def discard(self, predicate):
+        for key in [k for k in self.entries if predicate(k)]:
+            self.bytes -= self.entries.pop(key)[1]
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def _evict(self):
+        evicted = 0
+        while self.entries and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+            _, (_, nbytes) = self.entries.popitem(last=False)
+            self.bytes -= nbytes
+            evicted += 1
+        return evicted
@@ -0,0 +1,74 @@
+from PIL import Image
+import fitz  # PyMuPDF
+
+# Colour profiles a document can be rendered with
+COLOR = 'color'
+GRAYSCALE = 'grayscale'
+NIGHT = 'night'
+NIGHT_GRAY = 'night_gray'
+
+PROFILES = {
+    COLOR: "Colour",
+    GRAYSCALE: "Grayscale",
+    NIGHT: "Night (inverted)",
+    NIGHT_GRAY: "Night grayscale",
+}
+
+# Night mode dims the inverted page for eye comfort
+NIGHT_DIM = 0.7
+
+
+def is_gray(profile):
+    return profile in (GRAYSCALE, NIGHT_GRAY)
+
+
+def is_inverted(profile):
+    return profile in (NIGHT, NIGHT_GRAY)
+
+
+def tone_curve(profile, brightness):
+    """Output level for each input level: brightness, then inversion and dimming for night profiles."""
+    curve = []
+    for level in range(256):
+        value = min(255.0, level * brightness)
+        if is_inverted(profile):
+            value = (255.0 - value) * NIGHT_DIM
+        curve.append(int(round(value)))
+    return curve
+
+
+def render_pixmap(page, scale, clip=None, profile=COLOR):
+    # Grayscale profiles ask MuPDF for one byte per pixel instead of three; never render alpha
+    colorspace = fitz.csGRAY if is_gray(profile) else fitz.csRGB
+    return page.get_pixmap(matrix=fitz.Matrix(scale, scale), clip=clip, colorspace=colorspace, alpha=False)
+
+
+def apply_tone(pix, profile, brightness=1.0):
+    """Apply brightness and night inversion to the pixmap in place, if MuPDF can do it.
+
+    Returns False when the curve is not linear (brightening clips highlights) and
+    the caller has to apply ``tone_curve`` itself.
+    """
+    if brightness > 1.0:
+        return False
+    if not is_inverted(profile) and brightness == 1.0:
+        return True
+    curve = tone_curve(profile, brightness)
+    black, white = curve[0], curve[255]
+    # tint_with maps black and white to the given levels and interpolates in between
+    pix.tint_with(black * 0x010101, white * 0x010101)
+    return True
+
+
+def pixmap_to_image(pix):
+    # Wrap the raw samples directly instead of round-tripping through an encoded format
+    mode = "L" if pix.n == 1 else "RGB"
+    return Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+
+
+def render_image(page, scale, clip=None, profile=COLOR, brightness=1.0):
+    """Render a page (or the clipped part of it) to a PIL image, as displayed by the viewer."""
+    pix = render_pixmap(page, scale, clip, profile)
+    if apply_tone(pix, profile, brightness):
+        return pixmap_to_image(pix)
+    return pixmap_to_image(pix).point(tone_curve(profile, brightness) * (1 if pix.n == 1 else 3))
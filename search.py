@@ -0,0 +1,94 @@
+import time
+import queue
+import threading
+from collections import OrderedDict
+
+import fitz  # PyMuPDF
+
+
+def next_hit(hits, current_page, current_hit=None):
+    """The (page, index) hit to move to from current_hit on current_page.
+
+    Steps through the hits on a page before moving on; from anywhere else it
+    goes to the first hit on or after current_page, wrapping around.
+    """
+    # Hits arrive in scan order, which wraps around from the page the search started on
+    hits = sorted(hits)
+    if not hits:
+        return None
+    if current_hit in hits and current_hit[0] == current_page:
+        return hits[(hits.index(current_hit) + 1) % len(hits)]
+    later = [hit for hit in hits if hit[0] >= current_page]
+    return later[0] if later else hits[0]
+
+
+class SearchWorker(threading.Thread):
+    """Scans a document for text on a background thread and streams hits back.
+
+    The worker opens its own handle on the file so it never touches the
+    document the UI is rendering from. Each call to ``search`` bumps the
+    generation, which makes any scan in progress stop at the next page.
+    Hits are put on ``results`` as ``(generation, page_number, rects)`` and a
+    scan ends with ``(generation, None, None)``. Per-page hits for recent
+    queries are kept so retyping a query does not search those pages again.
+    """
+
+    def __init__(self, path, cached_queries=8):
+        super().__init__(daemon=True)
+        self.path = path
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.generation = 0
+        self.cached_queries = cached_queries
+        self.known = OrderedDict()
+        self.started_at = None
+        self.first_hit_after = None
+
+    def search(self, query, start_page):
+        self.generation += 1
+        self.started_at = time.perf_counter()
+        self.first_hit_after = None
+        self.requests.put((self.generation, query, start_page))
+        return self.generation
+
+    def cancel(self):
+        self.generation += 1
+
+    def close(self):
+        self.cancel()
+        self.requests.put(None)
+
+    def run(self):
+        doc = fitz.open(self.path)
+        try:
+            while True:
+                request = self.requests.get()
+                if request is None:
+                    return
+                generation, query, start_page = request
+                if generation != self.generation:
+                    continue
+                self._scan(doc, generation, query, start_page)
+        finally:
+            doc.close()
+
+    def _scan(self, doc, generation, query, start_page):
+        page_count = len(doc)
+        hits = self.known.setdefault(query, {})
+        self.known.move_to_end(query)
+        while len(self.known) > self.cached_queries:
+            self.known.popitem(last=False)
+
+        for i in range(page_count):
+            if generation != self.generation:
+                return
+            page_number = (start_page + i) % page_count
+            rects = hits.get(page_number)
+            if rects is None:
+                rects = [tuple(r) for r in doc.load_page(page_number).search_for(query)]
+                hits[page_number] = rects
+            if rects:
+                if self.first_hit_after is None:
+                    self.first_hit_after = time.perf_counter() - self.started_at
+                self.results.put((generation, page_number, rects))
+        self.results.put((generation, None, None))
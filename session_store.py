@@ -0,0 +1,81 @@
+import os
+import sys
+import json
+from pathlib import Path
+
+
+def default_state_dir():
+    if sys.platform == 'win32':
+        base = os.environ.get('APPDATA') or os.path.expanduser('~')
+        return Path(base) / 'NathFileReader'
+    return Path(os.path.expanduser('~')) / '.nathfilereader'
+
+
+def atomic_write(path, data):
+    """Write bytes to path so readers only ever see the old or the new content."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class SessionStore:
+    """Session state (open files, page, zoom, scroll) plus a snapshot of the last viewport.
+
+    The previous state is kept as a backup so a torn or corrupt write never
+    loses the session.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory) if directory else default_state_dir()
+        self.path = self.directory / 'session.json'
+        self.backup_path = self.directory / 'session.json.bak'
+        self.snapshot_path = self.directory / 'snapshot.png'
+        self.settings_path = self.directory / 'settings.json'
+
+    def load(self):
+        for path in (self.path, self.backup_path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+                if isinstance(state, dict):
+                    return state
+            except (OSError, ValueError):
+                continue
+        return {}
+
+    def save(self, state):
+        data = json.dumps(state, indent=2).encode('utf-8')
+        if self.path.exists():
+            try:
+                atomic_write(self.backup_path, self.path.read_bytes())
+            except OSError:
+                pass
+        atomic_write(self.path, data)
+
+    def load_settings(self, defaults):
+        settings = dict(defaults)
+        try:
+            with open(self.settings_path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            if isinstance(stored, dict):
+                settings.update(stored)
+        except (OSError, ValueError):
+            pass
+        return settings
+
+    def save_settings(self, settings):
+        atomic_write(self.settings_path, json.dumps(settings, indent=2).encode('utf-8'))
+
+    def save_snapshot(self, png_bytes):
+        atomic_write(self.snapshot_path, png_bytes)
+
+    def clear_snapshot(self):
+        try:
+            self.snapshot_path.unlink()
+        except OSError:
+            pass
@@ -11,6 +11,7 @@ setup(
         'python-docx>=0.8.11',
         'python-pptx>=0.6.21',
         'Pillow>=9.0.0',
+        'numpy>=1.21',
         'customtkinter>=5.2.0'
     ],
     entry_points={
@@ -0,0 +1,97 @@
+import os
+import json
+import queue
+import socket
+import secrets
+import threading
+
+from session_store import default_state_dir, atomic_write
+
+# Only lightweight imports here: the hand-off runs before the GUI stack is loaded
+
+HANDOFF_TIMEOUT = 0.5
+
+
+def instance_file():
+    return default_state_dir() / 'instance.json'
+
+
+def hand_off(args, path=None):
+    """Pass args to a running reader. Returns True if it accepted them and this process can exit."""
+    if '--new-instance' in args:
+        return False
+    path = path or instance_file()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        # URLs are passed through as they are
+        files = [a if '://' in a else os.path.abspath(a) for a in args if not a.startswith('--')]
+        message = json.dumps({'token': info['token'], 'files': files}) + '\n'
+        with socket.create_connection(('127.0.0.1', info['port']), timeout=HANDOFF_TIMEOUT) as conn:
+            conn.sendall(message.encode('utf-8'))
+            return conn.makefile('r', encoding='utf-8').readline().strip() == 'ok'
+    except (OSError, ValueError, KeyError):
+        return False
+
+
+class InstanceServer:
+    """Accepts file hand-offs from later launches on a localhost socket.
+
+    Requests arrive on a background thread and are queued; ``poll`` drains the
+    queue on the Tk thread and calls ``on_open(files)`` for each request.
+    """
+
+    def __init__(self, on_open, path=None):
+        self.on_open = on_open
+        self.path = path or instance_file()
+        self.token = secrets.token_hex(16)
+        self.requests = queue.Queue()
+        self.sock = None
+        self.thread = None
+
+    def start(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(8)
+        port = self.sock.getsockname()[1]
+        atomic_write(self.path, json.dumps({'port': port, 'token': self.token, 'pid': os.getpid()}).encode('utf-8'))
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+        return port
+
+    def stop(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                owned = json.load(f).get('token') == self.token
+            if owned:
+                os.remove(self.path)
+        except (OSError, ValueError):
+            pass
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+
+    def poll(self):
+        while True:
+            try:
+                files = self.requests.get_nowait()
+            except queue.Empty:
+                return
+            self.on_open(files)
+
+    def _serve(self):
+        while self.sock:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            with conn:
+                try:
+                    conn.settimeout(HANDOFF_TIMEOUT)
+                    request = json.loads(conn.makefile('r', encoding='utf-8').readline())
+                    if request.get('token') != self.token:
+                        continue
+                    self.requests.put(list(request.get('files', [])))
+                    conn.sendall(b'ok\n')
+                except (OSError, ValueError, AttributeError):
+                    continue
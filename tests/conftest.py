@@ -0,0 +1,130 @@
+import os
+import sys
+import json
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PERF_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'perf')
+BUDGETS_FILE = os.path.join(PERF_DIR, 'budgets.json')
+GOLDEN_FILE = os.path.join(PERF_DIR, 'golden.json')
+
+sys.path.insert(0, ROOT)
+
+LOREM = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit. Sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua. Ut enim ad minim veniam, quis nostrud."
+)
+
+
+def pytest_addoption(parser):
+    parser.addoption("--update-golden", action="store_true",
+                     help="Rewrite tests/perf/golden.json from the current render output")
+    parser.addoption("--budget-scale", type=float, default=1.0,
+                     help="Multiply every latency budget, e.g. 2.0 on slow CI machines")
+
+
+def load_budgets():
+    with open(BUDGETS_FILE, 'r') as f:
+        config = json.load(f)
+    budgets = {}
+    for name, overrides in config['documents'].items():
+        budget = dict(config['defaults'])
+        budget.update(overrides)
+        budgets[name] = budget
+    return budgets
+
+
+def pytest_generate_tests(metafunc):
+    # One run per document in the budgets file for tests that take a corpus document name
+    if "document_name" in metafunc.fixturenames:
+        metafunc.parametrize("document_name", sorted(load_budgets()))
+
+
+def build_corpus(directory):
+    """Generate the fixed test corpus; content depends only on this code, not on the machine."""
+    fitz = pytest.importorskip("fitz")
+    paths = {'test_document.pdf': os.path.join(ROOT, 'test_document.pdf')}
+
+    doc = fitz.open()
+    for number in range(30):
+        page = doc.new_page()
+        lines = [f"Page {number + 1}"] + [f"{line:02d} {LOREM}"[:95] for line in range(45)]
+        page.insert_text((50, 60), "\n".join(lines), fontsize=10)
+    paths['text_heavy.pdf'] = os.path.join(directory, 'text_heavy.pdf')
+    doc.save(paths['text_heavy.pdf'], deflate=True)
+    doc.close()
+
+    doc = fitz.open()
+    for number in range(5):
+        page = doc.new_page()
+        for i in range(60):
+            x = 40 + (i * 37 + number * 11) % 500
+            y = 40 + (i * 53 + number * 7) % 700
+            page.draw_rect(fitz.Rect(x, y, x + 40, y + 25), color=(0, 0, 1), fill=(i % 5 / 5, 0.6, 0.3), width=1)
+            page.draw_circle((x + 20, y + 12), 9, color=(1, 0, 0), width=0.5)
+            page.draw_line((40, y), (560, y + i % 30), color=(0, 0, 0), width=0.3)
+    paths['vector_drawing.pdf'] = os.path.join(directory, 'vector_drawing.pdf')
+    doc.save(paths['vector_drawing.pdf'], deflate=True)
+    doc.close()
+
+    # A0 sheet, the kind of page that produces very large pixmaps
+    doc = fitz.open()
+    page = doc.new_page(width=2384, height=3370)
+    for i in range(120):
+        page.draw_rect(fitz.Rect(50 + i * 18, 50 + i * 25, 400 + i * 15, 200 + i * 25), color=(0.2, 0.2, 0.2), width=2)
+    page.insert_text((100, 150), "\n".join([LOREM] * 80), fontsize=14)
+    paths['large_page.pdf'] = os.path.join(directory, 'large_page.pdf')
+    doc.save(paths['large_page.pdf'], deflate=True)
+    doc.close()
+    return paths
+
+
+def write_pdf(path, pages=3, size=(595, 842), label="Page {}", fontsize=14, decorate=None):
+    """Small generated PDF for feature tests; decorate(page, index) adds per-test content."""
+    fitz = pytest.importorskip("fitz")
+    doc = fitz.open()
+    for index in range(pages):
+        page = doc.new_page(width=size[0], height=size[1])
+        page.insert_text((72, 72), label.format(index + 1), fontsize=fontsize)
+        if decorate:
+            decorate(page, index)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+@pytest.fixture(scope="session")
+def make_pdf(tmp_path_factory):
+    """Factory writing a write_pdf document named name, into folder or a fresh temporary one."""
+    def make(name, folder=None, **options):
+        folder = folder or tmp_path_factory.mktemp("pdf")
+        return write_pdf(os.path.join(str(folder), name), **options)
+    return make
+
+
+@pytest.fixture(scope="session")
+def corpus(tmp_path_factory):
+    return build_corpus(str(tmp_path_factory.mktemp("corpus")))
+
+
+@pytest.fixture(scope="session")
+def budgets():
+    return load_budgets()
+
+
+@pytest.fixture(scope="session")
+def budget_scale(request):
+    return request.config.getoption("--budget-scale")
+
+
+@pytest.fixture(scope="session")
+def golden(request):
+    with open(GOLDEN_FILE, 'r') as f:
+        data = json.load(f)
+    update = request.config.getoption("--update-golden")
+    yield {'data': data, 'update': update}
+    if update:
+        with open(GOLDEN_FILE, 'w') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+            f.write("\n")
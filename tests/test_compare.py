@@ -0,0 +1,101 @@
+import time
+from concurrent.futures import Future
+
+import pytest
+
+np = pytest.importorskip("numpy")
+fitz = pytest.importorskip("fitz")
+
+from compare import CompareSession, changed_regions, diff_mask, diff_page
+
+PAGES = 6
+CHANGED = 3
+STAMP = fitz.Rect(300, 500, 500, 560)
+
+
+def draw_sheet(page, index, revised=False):
+    page.draw_rect(fitz.Rect(72, 100, 520, 400), color=(0, 0, 0), width=1)
+    if revised and index == CHANGED:
+        page.draw_rect(STAMP, color=(1, 0, 0), fill=(1, 0, 0))
+
+
+@pytest.fixture
+def documents(tmp_path, make_pdf):
+    options = {'folder': tmp_path, 'label': "Sheet {}", 'fontsize': 18}
+    return (
+        make_pdf("a.pdf", pages=PAGES, decorate=draw_sheet, **options),
+        make_pdf("b.pdf", pages=PAGES + 1, decorate=lambda page, index: draw_sheet(page, index, revised=True), **options),
+    )
+
+
+def test_regions_group_connected_pixels():
+    mask = np.zeros((200, 300), dtype=bool)
+    mask[10:30, 10:40] = True
+    mask[30:50, 35:60] = True  # touches the first block
+    mask[150:160, 200:290] = True
+    assert changed_regions(mask, cell=10) == [(10, 10, 60, 50), (200, 150, 290, 160)]
+
+
+def test_identical_and_padded_arrays():
+    white = np.full((40, 50, 3), 255, dtype=np.uint8)
+    assert not diff_mask(white, white.copy()).any()
+    # A smaller, all-white render counts as white paper in the missing area
+    assert not diff_mask(white, white[:30, :20]).any()
+    noisy = white.copy()
+    noisy[5, 5] = 240
+    assert not diff_mask(white, noisy).any()
+    noisy[6, 6] = (255, 0, 0)
+    assert diff_mask(white, noisy).sum() == 1
+
+
+def test_diff_page_locates_change(documents):
+    doc_a, doc_b = (fitz.open(path) for path in documents)
+    assert diff_page(doc_a, doc_b, 0)['regions'] == []
+    result = diff_page(doc_a, doc_b, CHANGED)
+    assert len(result['regions']) == 1
+    region = fitz.Rect(result['regions'][0])
+    assert region.contains(STAMP)
+    assert region.width < STAMP.width + 20 and region.height < STAMP.height + 20
+    missing = diff_page(doc_a, doc_b, PAGES)
+    assert missing['missing'] and missing['changed'] == 1.0
+
+
+def test_session_finds_differing_pages(documents):
+    session = CompareSession(*documents, workers=2)
+    try:
+        assert session.page_count == PAGES + 1
+        assert session.next_different(0) == (None, False)
+        deadline = time.monotonic() + 60
+        while not session.done and time.monotonic() < deadline:
+            session.poll()
+            time.sleep(0.01)
+        assert session.done
+        assert session.next_different(0) == (CHANGED, True)
+        assert session.next_different(CHANGED) == (PAGES, True)
+        assert session.next_different(PAGES, step=-1) == (CHANGED, True)
+        assert session.next_different(CHANGED, step=-1) == (None, True)
+    finally:
+        session.close()
+
+
+def test_backward_focus_diffs_earlier_pages_first(documents):
+    session = CompareSession(*documents, workers=1)
+    try:
+        session.focus(4, -1)
+        session.poll()
+        assert sorted(session.pending) == [3, 4]
+    finally:
+        session.close()
+
+
+def test_failed_page_is_recorded_and_skipped(documents):
+    session = CompareSession(*documents, workers=1)
+    try:
+        failed = Future()
+        failed.set_exception(RuntimeError("cannot render"))
+        session.pending[1] = failed
+        assert 1 in session.poll()
+        assert session.result(1)['error'] == "cannot render"
+        assert session.result(1)['regions'] == []
+    finally:
+        session.close()
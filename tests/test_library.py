@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+pytest.importorskip("fitz")
+
+from library import LibraryCatalog
+
+
+@pytest.fixture
+def library(tmp_path, make_pdf):
+    outer = tmp_path / "drawings"
+    inner = outer / "archive"
+    other = tmp_path / "manuals"
+    for folder in (inner, other):
+        folder.mkdir(parents=True)
+    make_pdf("plan.pdf", outer)
+    make_pdf("old_plan.pdf", inner)
+    make_pdf("manual.pdf", other)
+    make_pdf("index.pdf", other)
+    catalog = LibraryCatalog(tmp_path / "catalog.db")
+    for folder in (outer, inner, other):
+        catalog.add_folder(str(folder))
+    yield catalog, outer
+    catalog.close()
+
+
+def test_progress_counts_all_folders_together(library):
+    catalog, _ = library
+    updates = []
+    assert catalog.scan(workers=1, progress=lambda done, total: updates.append((done, total))) == (4, 0, 0)
+    assert updates == [(1, 4), (2, 4), (3, 4), (4, 4)]
+    assert catalog.count() == 4
+
+
+def test_nested_folders_rescan_incrementally(library):
+    catalog, outer = library
+    catalog.scan(workers=1)
+    assert catalog.scan(workers=1) == (0, 0, 4)
+
+    os.remove(os.path.join(str(outer), "archive", "old_plan.pdf"))
+    assert catalog.scan(workers=1) == (0, 1, 3)
+
+
+def test_unreachable_folder_keeps_its_documents(library, tmp_path):
+    catalog, _ = library
+    catalog.scan(workers=1)
+    # A network share that is offline looks like a missing folder
+    os.rename(str(tmp_path / "manuals"), str(tmp_path / "manuals-offline"))
+    assert catalog.scan(workers=1) == (0, 0, 2)
+    assert catalog.count() == 4
+    assert catalog.thumbnail(str(tmp_path / "manuals" / "manual.pdf"))
+
+    os.rename(str(tmp_path / "manuals-offline"), str(tmp_path / "manuals"))
+    assert catalog.scan(workers=1) == (0, 0, 4)
+
+
+def test_walk_errors_keep_documents_below_the_folder(library, monkeypatch):
+    catalog, outer = library
+    catalog.scan(workers=1)
+    real_walk = os.walk
+
+    def failing_walk(top, onerror=None, **kwargs):
+        # The archive subfolder cannot be listed, as with a dropped connection
+        for entry in real_walk(top, onerror=onerror, **kwargs):
+            if entry[0].endswith("archive"):
+                onerror(OSError("connection lost"))
+                continue
+            yield entry
+
+    monkeypatch.setattr(os, "walk", failing_walk)
+    indexed, removed, unchanged = catalog.scan(workers=1)
+    assert (indexed, removed) == (0, 0)
+    assert catalog.count() == 4
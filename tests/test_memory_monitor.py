@@ -0,0 +1,54 @@
+import memory_monitor
+from memory_monitor import MemoryMonitor, NORMAL, ELEVATED, CRITICAL, MB
+
+
+def monitor():
+    return MemoryMonitor(None, lambda level, sample: None, rss_elevated=1000 * MB, rss_critical=2000 * MB,
+                         available_elevated=0.15, available_critical=0.07, hysteresis=1.25)
+
+
+def rss(mb):
+    return {'rss': mb * MB, 'available': None, 'total': None}
+
+
+def available(ratio):
+    return {'rss': None, 'available': int(ratio * 1000) * MB, 'total': 1000 * MB}
+
+
+def test_levels_rise_at_the_thresholds():
+    m = monitor()
+    assert m.classify(rss(900)) == NORMAL
+    assert m.classify(rss(1100)) == ELEVATED
+    assert m.classify(rss(2100)) == CRITICAL
+    assert m.classify(available(0.10)) == ELEVATED
+    assert m.classify(available(0.05)) == CRITICAL
+    assert m.classify({'rss': None, 'available': None, 'total': None}) == NORMAL
+
+
+def test_levels_only_drop_with_a_margin():
+    m = monitor()
+    # Just below the raising threshold keeps the level; below it by the margin drops it
+    assert m.classify(rss(900), ELEVATED) == ELEVATED
+    assert m.classify(rss(790), ELEVATED) == NORMAL
+    assert m.classify(rss(1900), CRITICAL) == CRITICAL
+    assert m.classify(rss(1500), CRITICAL) == ELEVATED
+    assert m.classify(available(0.16), ELEVATED) == ELEVATED
+    assert m.classify(available(0.20), ELEVATED) == NORMAL
+    assert m.classify(available(0.08), CRITICAL) == CRITICAL
+    assert m.classify(available(0.09), CRITICAL) == ELEVATED
+
+
+def test_check_reports_only_changes(monkeypatch):
+    changes = []
+    m = MemoryMonitor(None, lambda level, sample: changes.append(level), rss_elevated=1000 * MB, rss_critical=2000 * MB)
+    samples = iter([1100, 950, 700])
+    monkeypatch.setattr(m, 'sample', lambda: rss(next(samples)))
+    assert [m.check() for _ in range(3)] == [ELEVATED, ELEVATED, NORMAL]
+    assert changes == [ELEVATED, NORMAL]
+
+
+def test_rss_is_unknown_without_proc(monkeypatch):
+    # getrusage only has the peak, which would never let the level drop
+    monkeypatch.setattr(memory_monitor.sys, 'platform', 'darwin')
+    monkeypatch.setattr(memory_monitor.os.path, 'exists', lambda path: False)
+    assert memory_monitor.get_process_rss() is None
@@ -0,0 +1,64 @@
+import io
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+Image = pytest.importorskip("PIL.Image")
+
+from metrics import Metrics
+from mupdf_store import StoreManager, classify_bound, store_size, MB
+
+
+def add_photo(page, index):
+    # A large image so the decoded copy dominates the store
+    data = io.BytesIO()
+    Image.new("RGB", (2000, 2000), (40 + index * 60, 120, 200)).save(data, "PNG")
+    page.insert_image(page.rect, stream=data.getvalue())
+
+
+@pytest.fixture
+def photo_document(make_pdf):
+    doc = fitz.open(make_pdf("photos.pdf", pages=2, decorate=add_photo))
+    yield doc
+    doc.close()
+
+
+def test_store_size_is_reported(photo_document):
+    fitz.TOOLS.store_shrink(100)
+    photo_document.load_page(0).get_pixmap()
+    size = store_size()
+    if size is None:
+        pytest.skip("This PyMuPDF build reports no store size")
+    assert size > 4 * MB
+
+
+def test_budget_shrinks_the_store(photo_document):
+    manager = StoreManager(Metrics(), budget_mb=1)
+    for page in photo_document:
+        page.get_pixmap()
+    if manager.sample() is None:
+        pytest.skip("This PyMuPDF build reports no store size")
+    manager.enforce_budget()
+    assert manager.metrics.counters['mupdf.store_shrinks'] == 1
+    assert store_size() <= 1 * MB
+
+
+def test_profile_page_result(photo_document):
+    manager = StoreManager(Metrics())
+    result = manager.profile_page(photo_document, 1, 1.0)
+    assert set(result) == {'page', 'images', 'interpret', 'decode', 'rasterize_cold', 'rasterize_warm', 'bound'}
+    assert result['page'] == 1 and result['images'] == 1
+    assert all(result[key] >= 0 for key in ('interpret', 'decode', 'rasterize_cold', 'rasterize_warm'))
+    assert result['bound'] in ('resource decoding', 'rasterization')
+    assert manager.page_profiles == [result]
+    assert "Limited by" in manager.report()
+
+
+@pytest.mark.parametrize("decode, cold, warm, bound", [
+    (0.050, 0.060, 0.010, 'resource decoding'),  # image decoding dominates
+    (0.001, 0.090, 0.020, 'resource decoding'),  # the warm store saves most of the render
+    (0.001, 0.030, 0.025, 'rasterization'),
+    (0.0, 0.0, 0.0, 'rasterization'),
+])
+def test_bound_classification(decode, cold, warm, bound):
+    assert classify_bound(decode, cold, warm) == bound
@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from presentation import EventClock, FrameRing, SlideRenderer, fit_scale, render_slide
+
+SCREEN = (1920, 1080)
+
+
+@pytest.fixture
+def deck(make_pdf):
+    return make_pdf("deck.pdf", pages=5, size=(960, 540), label="Slide {}", fontsize=32)
+
+
+def test_fit_scale_keeps_the_whole_page_on_screen():
+    assert fit_scale(fitz.Rect(0, 0, 960, 540), *SCREEN) == 2.0
+    # Portrait pages are limited by the screen height
+    assert fit_scale(fitz.Rect(0, 0, 595, 842), *SCREEN) == pytest.approx(1080 / 842)
+
+
+def test_neighbouring_slides_share_the_ring():
+    ring = FrameRing(3)
+    for page_number in (4, 5, 6):
+        ring.put(page_number, SCREEN, f"frame {page_number}")
+    assert [ring.get(p, SCREEN) for p in (4, 5, 6)] == ["frame 4", "frame 5", "frame 6"]
+    # Advancing to 6 pre-renders 7 into the slot 4 used
+    ring.put(7, SCREEN, "frame 7")
+    assert ring.get(4, SCREEN) is None
+    assert (5, SCREEN) in ring and (7, SCREEN) in ring
+    # Frames for another screen size are not reused
+    assert ring.get(5, (1280, 720)) is None
+
+
+def test_slides_render_at_screen_resolution(deck):
+    doc = fitz.open(deck)
+    assert render_slide(doc, 0, SCREEN).size == SCREEN
+
+
+def test_renderer_only_returns_wanted_slides(deck):
+    renderer = SlideRenderer(deck)
+    renderer.wanted = {1, 3}
+    try:
+        for page_number in (1, 2, 3):
+            renderer.request(page_number, SCREEN)
+        results = []
+        deadline = time.monotonic() + 30
+        while (renderer.pending or len(results) < 2) and time.monotonic() < deadline:
+            results.extend(renderer.poll())
+            time.sleep(0.01)
+    finally:
+        renderer.close()
+    assert sorted((page, size, image.size) for page, size, image in results) == [(1, SCREEN, SCREEN), (3, SCREEN, SCREEN)]
+
+
+def test_event_clock_uses_the_least_delayed_event():
+    clock = EventClock()
+    # The first event was handled 300ms late, the second promptly
+    assert clock.arrival(1000, now=50.3) == pytest.approx(50.3)
+    assert clock.arrival(2000, now=51.0) == pytest.approx(51.0)
+    # Later estimates use the smaller offset, so the first event's delay shows up
+    assert clock.arrival(1000, now=52.0) == pytest.approx(50.0)
+    # A wrapped timestamp starts the estimate again
+    assert clock.arrival(5, now=200.0) == pytest.approx(200.0)
@@ -0,0 +1,104 @@
+import os
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from remote_document import RemoteDocument, read_linearization
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'linearized.pdf')
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serves one file and honours single byte-range requests, like the document server."""
+
+    payload = b''
+    support_ranges = True
+    sent = 0
+
+    def do_GET(self):
+        body = self.payload
+        status = 200
+        headers = {'ETag': '"v1"', 'Accept-Ranges': 'bytes' if self.support_ranges else 'none'}
+        requested = self.headers.get('Range')
+        if requested and self.support_ranges:
+            start, end = requested.split('=', 1)[1].split('-')
+            start, end = int(start), min(int(end), len(self.payload) - 1)
+            body = self.payload[start:end + 1]
+            status = 206
+            headers['Content-Range'] = f'bytes {start}-{end}/{len(self.payload)}'
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        type(self).sent += len(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    with open(DATA, 'rb') as f:
+        payload = f.read()
+    handler = type('Handler', (RangeHandler,), {'payload': payload, 'sent': 0})
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield handler, f"http://127.0.0.1:{httpd.server_address[1]}/linearized.pdf"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def open_remote(url, cache_dir):
+    return RemoteDocument(url, cache_dir=str(cache_dir), chunk_size=8 * 1024, tail_window=16 * 1024)
+
+
+def test_linearization_parameters_are_read():
+    with open(DATA, 'rb') as f:
+        params = read_linearization(f.read(1024))
+    assert params['N'] == 300
+    assert params['L'] == os.path.getsize(DATA)
+
+
+def test_first_page_needs_only_part_of_the_file(server, tmp_path):
+    handler, url = server
+    remote = open_remote(url, tmp_path)
+    assert remote.fetch_first_page()
+    assert handler.sent < len(handler.payload) / 3
+
+    preview = remote.open_preview()
+    assert preview is not None
+    assert preview.page_count == 300
+    expected = fitz.open(DATA).load_page(0).get_pixmap()
+    assert preview.load_page(0).get_pixmap().samples == expected.samples
+
+
+def test_download_completes_and_is_reused(server, tmp_path):
+    handler, url = server
+    remote = open_remote(url, tmp_path)
+    remote.fetch_first_page()
+    assert remote.download_rest()
+    assert remote.complete
+    with open(remote.path, 'rb') as f:
+        assert f.read() == handler.payload
+
+    # A second open only revalidates the first chunk
+    handler.sent = 0
+    again = open_remote(url, tmp_path)
+    assert again.fetch_first_page()
+    assert again.complete
+    assert handler.sent == 8 * 1024
+
+
+def test_server_without_range_support(server, tmp_path):
+    handler, url = server
+    handler.support_ranges = False
+    remote = open_remote(url, tmp_path)
+    remote.fetch_first_page()
+    assert remote.complete
+    assert remote.open_preview().page_count == 300
@@ -0,0 +1,52 @@
+from render_cache import RenderCache
+
+
+def filled(max_entries=3, max_bytes=100):
+    cache = RenderCache(max_entries, max_bytes)
+    for page in range(3):
+        cache.put(page, f"page {page}", 30)
+    return cache
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = filled()
+    assert cache.get(0) == "page 0"
+    cache.put(3, "page 3", 30)
+    assert list(cache.entries) == [2, 0, 3]
+    assert cache.bytes == 90
+    assert (cache.hits, cache.misses) == (1, 0)
+    assert cache.get(1) is None
+    assert cache.misses == 1
+
+
+def test_byte_budget_evicts_and_oversized_entries_are_skipped():
+    cache = filled()
+    cache.put(3, "big page", 60)
+    assert list(cache.entries) == [2, 3]
+    assert cache.bytes == 90
+    cache.put(4, "huge page", 101)
+    assert 4 not in cache
+    # Replacing an entry replaces its size too
+    cache.put(2, "page 2 again", 10)
+    assert cache.bytes == 70
+
+
+def test_resize_evicts_down_to_the_new_limits():
+    cache = filled()
+    assert cache.resize(max_entries=2) == 1
+    assert list(cache.entries) == [1, 2]
+    assert cache.resize(max_bytes=40) == 1
+    assert list(cache.entries) == [2]
+    assert cache.resize(max_entries=0) == 1
+    assert len(cache) == 0 and cache.bytes == 0
+    cache.put(5, "page 5", 10)
+    assert len(cache) == 0
+
+
+def test_discard_and_clear():
+    cache = filled()
+    cache.discard(lambda page: page % 2 == 0)
+    assert list(cache.entries) == [1]
+    assert cache.bytes == 30
+    cache.clear()
+    assert len(cache) == 0 and cache.bytes == 0
@@ -0,0 +1,118 @@
+import time
+import hashlib
+import statistics
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+Image = pytest.importorskip("PIL.Image")
+
+from memory_monitor import get_process_rss, MB
+from rendering import render_image
+
+SIGNATURE_SIZE = 16
+# Perceptual tolerance, in 8-bit grey levels on the downsampled signature
+MEAN_TOLERANCE = 2.0
+MAX_TOLERANCE = 32
+
+
+def timed(func, repeat=3):
+    # Best of a few runs keeps the budgets meaningful on a busy machine
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def signature(img):
+    small = img.convert("L").resize((SIGNATURE_SIZE, SIGNATURE_SIZE), Image.BOX)
+    return small.tobytes().hex()
+
+
+def test_open_within_budget(document_name, corpus, budgets, budget_scale):
+    budget = budgets[document_name]
+
+    def open_document():
+        doc = fitz.open(corpus[document_name])
+        count = len(doc)
+        doc.close()
+        return count
+
+    elapsed, page_count = timed(open_document)
+    assert page_count > 0
+    assert elapsed * 1000 <= budget['open_ms'] * budget_scale, (
+        f"{document_name}: open took {elapsed * 1000:.1f}ms, budget {budget['open_ms'] * budget_scale:.0f}ms")
+
+
+def test_render_within_budget(document_name, corpus, budgets, budget_scale):
+    budget = budgets[document_name]
+    doc = fitz.open(corpus[document_name])
+    try:
+        baseline = get_process_rss()
+        peak = baseline
+        timings = []
+        for scale in budget['scales']:
+            for page_number in range(len(doc)):
+                page = doc.load_page(page_number)
+                elapsed, img = timed(lambda: render_image(page, scale))
+                timings.append((elapsed, page_number, scale))
+                rss = get_process_rss()
+                if rss is not None and peak is not None:
+                    peak = max(peak, rss)
+                del img
+    finally:
+        doc.close()
+
+    slowest, page_number, scale = max(timings)
+    median = statistics.median(t[0] for t in timings)
+    assert slowest * 1000 <= budget['render_ms'] * budget_scale, (
+        f"{document_name}: page {page_number + 1} at {scale}x took {slowest * 1000:.1f}ms "
+        f"(median {median * 1000:.1f}ms), budget {budget['render_ms'] * budget_scale:.0f}ms")
+    if baseline is not None and peak is not None:
+        grown = (peak - baseline) / MB
+        assert grown <= budget['peak_mb'], (
+            f"{document_name}: memory grew {grown:.0f}MB while rendering, budget {budget['peak_mb']}MB")
+
+
+def test_render_matches_golden(document_name, corpus, budgets, golden):
+    budget = budgets[document_name]
+    doc = fitz.open(corpus[document_name])
+    try:
+        actual = {}
+        for scale in budget['scales']:
+            pages = []
+            for page_number in range(min(len(doc), budget['golden_pages'])):
+                img = render_image(doc.load_page(page_number), scale)
+                pages.append({
+                    'size': list(img.size),
+                    'sha256': hashlib.sha256(img.tobytes()).hexdigest(),
+                    'signature': signature(img),
+                })
+            actual[str(scale)] = pages
+    finally:
+        doc.close()
+
+    if golden['update']:
+        golden['data'][document_name] = actual
+        return
+    expected = golden['data'].get(document_name)
+    if expected is None:
+        pytest.skip(f"No golden renders for {document_name}; run pytest --update-golden")
+
+    for scale, pages in actual.items():
+        assert scale in expected, f"{document_name}: no golden renders at {scale}x"
+        assert len(pages) == len(expected[scale]), (
+            f"{document_name}: {len(pages)} pages rendered at {scale}x, golden has {len(expected[scale])}")
+        for page_number, (got, want) in enumerate(zip(pages, expected[scale])):
+            where = f"{document_name} page {page_number + 1} at {scale}x"
+            assert got['size'] == want['size'], f"{where}: size {got['size']} != {want['size']}"
+            if got['sha256'] == want['sha256']:
+                continue
+            diffs = [abs(a - b) for a, b in zip(bytes.fromhex(got['signature']), bytes.fromhex(want['signature']))]
+            mean = sum(diffs) / len(diffs)
+            assert mean <= MEAN_TOLERANCE and max(diffs) <= MAX_TOLERANCE, (
+                f"{where}: render differs from golden (mean {mean:.2f}, max {max(diffs)})")
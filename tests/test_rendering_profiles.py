@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+Image = pytest.importorskip("PIL.Image")
+from PIL import ImageChops, ImageEnhance
+
+from rendering import render_image, COLOR, GRAYSCALE, NIGHT, NIGHT_GRAY
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def reference_render(page, profile, brightness):
+    # The PIL pipeline ModernPDFViewer.show_page used before native profiles
+    pix = page.get_pixmap()
+    img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+    img = ImageEnhance.Brightness(img).enhance(brightness)
+    if profile in (NIGHT, NIGHT_GRAY):
+        img = Image.eval(img, lambda x: 255 - x)
+        img = ImageEnhance.Brightness(img).enhance(0.7)
+    if profile in (GRAYSCALE, NIGHT_GRAY):
+        img = img.convert("L")
+    return img
+
+
+@pytest.fixture(scope="module")
+def page():
+    doc = fitz.open(os.path.join(ROOT, "test_document.pdf"))
+    yield doc.load_page(0)
+    doc.close()
+
+
+@pytest.mark.parametrize("profile", [COLOR, GRAYSCALE, NIGHT, NIGHT_GRAY])
+@pytest.mark.parametrize("brightness", [0.5, 1.0, 1.9])
+def test_profile_matches_pil_pipeline(page, profile, brightness):
+    got = render_image(page, 1.0, profile=profile, brightness=brightness)
+    want = reference_render(page, profile, brightness)
+    assert got.mode == want.mode
+    assert got.size == want.size
+    diff = ImageChops.difference(got, want)
+    # Allow for rounding and for MuPDF's own grey conversion of anti-aliased edges
+    histogram = diff.convert("L").histogram()
+    mean = sum(level * count for level, count in enumerate(histogram)) / sum(histogram)
+    assert mean <= 1.0
+
+
+@pytest.mark.parametrize("profile", [GRAYSCALE, NIGHT_GRAY])
+def test_gray_profiles_use_one_byte_per_pixel(page, profile):
+    img = render_image(page, 1.0, profile=profile)
+    assert img.mode == "L"
+    assert len(img.tobytes()) == img.width * img.height
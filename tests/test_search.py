@@ -0,0 +1,95 @@
+import time
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from search import SearchWorker, next_hit
+
+PAGES = 5
+
+
+def add_terms(page, index):
+    # Page 2 mentions the valve twice, page 4 once
+    for line in range({1: 2, 3: 1}.get(index, 0)):
+        page.insert_text((72, 200 + 40 * line), "Check valve", fontsize=14)
+
+
+@pytest.fixture
+def document(tmp_path, make_pdf):
+    return make_pdf("manual.pdf", tmp_path, pages=PAGES, decorate=add_terms)
+
+
+def collect(worker, generation, timeout=10):
+    """Results put by the worker up to the end of scan generation, as (generation, page, rects)."""
+    results = []
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = worker.results.get(timeout=timeout)
+        results.append(result)
+        if result[0] == generation and result[1] is None:
+            return results
+    raise AssertionError(f"scan {generation} did not finish")
+
+
+def test_scan_wraps_around_from_the_start_page(document):
+    worker = SearchWorker(document)
+    worker.start()
+    try:
+        generation = worker.search("Page", 3)
+        pages = [page for _, page, _ in collect(worker, generation)[:-1]]
+        assert pages == [3, 4, 0, 1, 2]
+    finally:
+        worker.close()
+
+
+def test_superseded_searches_are_skipped(document):
+    worker = SearchWorker(document)
+    stale = worker.search("Page", 0)
+    current = worker.search("valve", 0)
+    worker.start()
+    try:
+        results = collect(worker, current)
+        assert {generation for generation, _, _ in results} == {current}
+        # The first search never ran, so nothing was cached for it
+        assert stale != current and "Page" not in worker.known
+        assert [(page, len(rects)) for _, page, rects in results[:-1]] == [(1, 2), (3, 1)]
+    finally:
+        worker.close()
+
+
+def test_repeated_query_reuses_page_hits(document, monkeypatch):
+    worker = SearchWorker(document)
+    worker.start()
+    try:
+        first = collect(worker, worker.search("valve", 0))
+        calls = []
+        search_for = fitz.Page.search_for
+
+        def counting(page, *args, **kwargs):
+            calls.append(page.number)
+            return search_for(page, *args, **kwargs)
+
+        monkeypatch.setattr(fitz.Page, "search_for", counting)
+        second = collect(worker, worker.search("valve", 0))
+        assert calls == []
+        assert [r[1:] for r in second] == [r[1:] for r in first]
+
+        collect(worker, worker.search("Check", 0))
+        assert len(calls) == PAGES
+    finally:
+        worker.close()
+
+
+def test_next_hit_steps_through_a_page_before_moving_on():
+    # In scan order, as a search started on page 3 delivers them
+    hits = [(3, 0), (1, 0), (1, 1), (1, 2)]
+    assert next_hit(hits, 0) == (1, 0)
+    assert next_hit(hits, 1, (1, 0)) == (1, 1)
+    assert next_hit(hits, 1, (1, 1)) == (1, 2)
+    assert next_hit(hits, 1, (1, 2)) == (3, 0)
+    assert next_hit(hits, 3, (3, 0)) == (1, 0)
+    # After paging away from the last hit, start again from the current page
+    assert next_hit(hits, 2, (1, 1)) == (3, 0)
+    assert next_hit(hits, 4) == (1, 0)
+    assert next_hit([], 0) is None
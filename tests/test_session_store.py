@@ -0,0 +1,40 @@
+import json
+
+from session_store import SessionStore, atomic_write
+
+
+def test_corrupt_session_falls_back_to_the_backup(tmp_path):
+    store = SessionStore(tmp_path)
+    store.save({'files': [{'path': 'a.pdf', 'page': 3}]})
+    store.save({'files': [{'path': 'b.pdf', 'page': 7}]})
+    assert json.loads(store.backup_path.read_text())['files'][0]['path'] == 'a.pdf'
+
+    # A write torn by a crash or power loss
+    store.path.write_text('{"files": [{"path": "b.p')
+    assert store.load() == {'files': [{'path': 'a.pdf', 'page': 3}]}
+
+    store.path.write_text('[]')
+    assert store.load()['files'][0]['path'] == 'a.pdf'
+
+
+def test_missing_or_unreadable_session_is_empty(tmp_path):
+    store = SessionStore(tmp_path)
+    assert store.load() == {}
+    store.path.write_text('not json')
+    store.backup_path.write_text('')
+    assert store.load() == {}
+
+
+def test_atomic_write_replaces_without_leaving_a_temporary_file(tmp_path):
+    path = tmp_path / 'nested' / 'settings.json'
+    atomic_write(path, b'first')
+    atomic_write(path, b'second')
+    assert path.read_bytes() == b'second'
+    assert [p.name for p in path.parent.iterdir()] == ['settings.json']
+
+
+def test_settings_merge_over_defaults(tmp_path):
+    store = SessionStore(tmp_path)
+    assert store.load_settings({'mupdf_store_mb': 256}) == {'mupdf_store_mb': 256}
+    store.save_settings({'max_render_pixels': 100})
+    assert store.load_settings({'mupdf_store_mb': 256}) == {'mupdf_store_mb': 256, 'max_render_pixels': 100}
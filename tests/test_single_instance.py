@@ -0,0 +1,73 @@
+import os
+import json
+import time
+import socket
+
+import pytest
+
+from single_instance import InstanceServer, hand_off
+
+
+@pytest.fixture
+def server(tmp_path):
+    opened = []
+    server = InstanceServer(opened.append, path=tmp_path / 'instance.json')
+    server.start()
+    yield server, opened
+    server.stop()
+
+
+def received(server, opened, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not opened and time.monotonic() < deadline:
+        server.poll()
+        time.sleep(0.01)
+    return opened
+
+
+def test_running_instance_accepts_files(server):
+    server, opened = server
+    assert hand_off(['drawing.pdf', 'https://example.com/spec.pdf'], server.path)
+    assert received(server, opened) == [[os.path.abspath('drawing.pdf'), 'https://example.com/spec.pdf']]
+
+
+def test_wrong_token_is_refused(server):
+    server, opened = server
+    info = json.loads(server.path.read_text())
+    info['token'] = 'not-the-token'
+    server.path.write_text(json.dumps(info))
+    assert not hand_off(['drawing.pdf'], server.path)
+    server.poll()
+    assert opened == []
+
+
+def test_stale_instance_file_fails_fast(tmp_path):
+    # A port nothing listens on, as left behind by a reader that crashed
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    path = tmp_path / 'instance.json'
+    path.write_text(json.dumps({'port': port, 'token': 'abc', 'pid': 1}))
+    started = time.perf_counter()
+    assert not hand_off(['drawing.pdf'], path)
+    assert time.perf_counter() - started < 1.0
+
+
+def test_new_instance_flag_skips_the_hand_off(server):
+    server, opened = server
+    assert not hand_off(['--new-instance', 'drawing.pdf'], server.path)
+    server.poll()
+    assert opened == []
+
+
+def test_stop_only_removes_its_own_file(tmp_path):
+    path = tmp_path / 'instance.json'
+    first = InstanceServer(lambda files: None, path=path)
+    second = InstanceServer(lambda files: None, path=path)
+    first.start()
+    second.start()
+    # The file now belongs to the second instance; the first must leave it alone
+    first.stop()
+    assert json.loads(path.read_text())['token'] == second.token
+    second.stop()
+    assert not path.exists()
@@ -0,0 +1,140 @@
+import io
+import time
+import json
+import urllib.request
+import urllib.error
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+Image = pytest.importorskip("PIL.Image")
+
+from tile_server import TileServer, DocumentPool, TILE_SIZE, document_id, tile_scale
+
+
+def add_link(page, index):
+    page.insert_link({'kind': fitz.LINK_URI, 'from': fitz.Rect(72, 100, 200, 120), 'uri': 'https://example.com/'})
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory, make_pdf):
+    folder = tmp_path_factory.mktemp("served")
+    path = make_pdf("deck.pdf", folder, label="Tile page {}", decorate=add_link)
+    server = TileServer(str(folder), port=0, workers=2)
+    server.start()
+    yield server, document_id(path)
+    server.stop()
+
+
+def get(server, path):
+    with urllib.request.urlopen(f"http://127.0.0.1:{server.port}{path}", timeout=30) as response:
+        return response.headers.get('Content-Type'), response.read()
+
+
+def test_lists_documents(server):
+    server, doc_id = server
+    _, body = get(server, "/docs")
+    assert json.loads(body) == [{'id': doc_id, 'name': 'deck.pdf'}]
+    _, body = get(server, f"/doc/{doc_id}")
+    info = json.loads(body)
+    assert info['pages'] == 3
+    assert info['page_sizes'][0] == [595.0, 842.0]
+
+
+@pytest.mark.parametrize("fmt", ["png", "webp"])
+def test_tiles_cover_the_page(server, fmt):
+    server, doc_id = server
+    suffix = "" if fmt == "png" else ".webp"
+    content_type, body = get(server, f"/doc/{doc_id}/page/0/tile/2/0/0{suffix}")
+    assert content_type == f"image/{fmt}"
+    assert Image.open(io.BytesIO(body)).size == (TILE_SIZE, TILE_SIZE)
+
+    # The last column is cut to the page edge
+    scale = tile_scale(2)
+    last = int(595 * scale) // TILE_SIZE
+    _, body = get(server, f"/doc/{doc_id}/page/0/tile/2/{last}/0{suffix}")
+    assert Image.open(io.BytesIO(body)).size[0] == round(595 * scale) - last * TILE_SIZE
+
+    with pytest.raises(urllib.error.HTTPError) as error:
+        get(server, f"/doc/{doc_id}/page/0/tile/2/{last + 1}/0{suffix}")
+    assert error.value.code == 404
+
+
+def test_repeated_tiles_come_from_the_cache(server):
+    server, doc_id = server
+    first = get(server, f"/doc/{doc_id}/page/1/tile/1/0/0")
+    hits = server.cache.hits
+    assert get(server, f"/doc/{doc_id}/page/1/tile/1/0/0") == first
+    assert server.cache.hits == hits + 1
+
+
+def test_text_and_links(server):
+    server, doc_id = server
+    _, body = get(server, f"/doc/{doc_id}/page/2/text")
+    words = [w['text'] for w in json.loads(body)['words']]
+    assert words == ["Tile", "page", "3"]
+    _, body = get(server, f"/doc/{doc_id}/page/2/links")
+    assert json.loads(body)['links'][0]['uri'] == "https://example.com/"
+
+
+def test_unknown_routes_and_pages(server):
+    server, doc_id = server
+    for path in ("/doc/missing", f"/doc/{doc_id}/page/9/text", f"/doc/{doc_id}/page/-1/text",
+                 f"/doc/{doc_id}/page/-1/tile/2/0/0", f"/doc/{doc_id}/page/0/tile/2/0/0.gif", "/nope"):
+        with pytest.raises(urllib.error.HTTPError) as error:
+            get(server, path)
+        assert error.value.code == 404, path
+
+
+def test_responses_allow_cross_origin_reads(server):
+    server, doc_id = server
+    with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/doc/{doc_id}", timeout=30) as response:
+        assert response.headers.get('Access-Control-Allow-Origin') == '*'
+    with pytest.raises(urllib.error.HTTPError) as error:
+        get(server, "/nope")
+    assert error.value.headers.get('Access-Control-Allow-Origin') == '*'
+
+
+def test_docs_rescans_the_folder(tmp_path, make_pdf):
+    make_pdf("first.pdf", tmp_path)
+    server = TileServer(str(tmp_path), port=0, workers=1, cors_origin="http://localhost:3000")
+    server.start()
+    try:
+        make_pdf("second.pdf", tmp_path)
+        # Within the throttle the listing is not rescanned
+        assert [d['name'] for d in json.loads(get(server, "/docs")[1])] == ["first.pdf"]
+        server.last_scan -= 11
+        assert sorted(d['name'] for d in json.loads(get(server, "/docs")[1])) == ["first.pdf", "second.pdf"]
+
+        request = urllib.request.Request(f"http://127.0.0.1:{server.port}/docs", method="OPTIONS")
+        with urllib.request.urlopen(request, timeout=30) as response:
+            assert response.status == 204
+            assert response.headers.get('Access-Control-Allow-Origin') == "http://localhost:3000"
+            assert 'GET' in response.headers.get('Access-Control-Allow-Methods')
+    finally:
+        server.stop()
+
+
+def test_pool_closes_idle_documents(make_pdf):
+    path = make_pdf("a.pdf")
+    other = make_pdf("b.pdf")
+    pool = DocumentPool(max_open=2, idle_seconds=60)
+    doc = pool.get(path, now=0)
+    assert pool.get(path, now=30) is doc
+    pool.get(other, now=50)
+    assert len(pool) == 2
+    pool.evict_idle(now=100)
+    assert list(pool.documents) == [other]
+    assert doc.is_closed
+    pool.close()
+
+
+def test_sweeper_closes_documents_without_further_requests(make_pdf):
+    pool = DocumentPool(idle_seconds=0.05)
+    doc = pool.get(make_pdf("idle.pdf"))
+    pool.start_sweeper(interval=0.02)
+    deadline = time.monotonic() + 5
+    while len(pool) and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert len(pool) == 0
+    assert doc.is_closed
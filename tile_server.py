@@ -0,0 +1,376 @@
+import io
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+
+import fitz  # PyMuPDF
+
+from library import find_pdfs
+from metrics import Metrics
+from render_cache import RenderCache
+from rendering import render_pixmap, pixmap_to_image
+
+TILE_SIZE = 256
+# Zoom level z renders the page at MIN_SCALE * 2**z
+MIN_SCALE = 0.25
+MAX_ZOOM = 6
+FORMATS = {'png': 'image/png', 'webp': 'image/webp'}
+DEFAULT_PORT = 8765
+# Encoded tiles shared by all clients
+TILE_CACHE_ENTRIES = 8192
+TILE_CACHE_BYTES = 256 * 1024 * 1024
+# Seconds between folder rescans triggered by requests
+RESCAN_INTERVAL = 10
+
+
+def tile_scale(z):
+    return MIN_SCALE * 2 ** z
+
+
+def document_id(path):
+    return hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+
+
+class DocumentPool:
+    """Open documents reused across requests; ones idle for too long are closed.
+
+    A document is reopened when its file has changed since it was opened.
+    Callers hold ``lock`` while they use a document so the sweeper thread
+    never closes it underneath them.
+    """
+
+    def __init__(self, max_open=8, idle_seconds=300):
+        self.max_open = max_open
+        self.idle_seconds = idle_seconds
+        self.documents = OrderedDict()
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.documents)
+
+    def get(self, path, mtime=None, now=None):
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            self.evict_idle(now)
+            entry = self.documents.pop(path, None)
+            if entry and mtime is not None and entry[1] != mtime:
+                entry[0].close()
+                entry = None
+            if entry is None:
+                entry = [fitz.open(path), mtime, now]
+            entry[2] = now
+            self.documents[path] = entry
+            while len(self.documents) > self.max_open:
+                self.documents.popitem(last=False)[1][0].close()
+            return entry[0]
+
+    def evict_idle(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            for path in [p for p, entry in self.documents.items() if now - entry[2] > self.idle_seconds]:
+                self.documents.pop(path)[0].close()
+
+    def start_sweeper(self, interval=None):
+        """Close idle documents on a timer, also in a worker that gets no further requests."""
+        interval = interval or max(1.0, min(self.idle_seconds / 2, 30.0))
+
+        def sweep():
+            while True:
+                time.sleep(interval)
+                self.evict_idle()
+
+        threading.Thread(target=sweep, daemon=True).start()
+
+    def close(self):
+        with self.lock:
+            for doc, _, _ in self.documents.values():
+                doc.close()
+            self.documents.clear()
+
+
+# Each render worker process keeps its own pool; documents cannot be shared between processes
+_pool = None
+
+
+def _init_worker(max_open, idle_seconds):
+    global _pool
+    _pool = DocumentPool(max_open, idle_seconds)
+    _pool.start_sweeper()
+
+
+def render_tile(doc, page_number, z, x, y, fmt='png'):
+    """Encoded tile (x, y) of a page at zoom level z, or None if it lies outside the page."""
+    page = doc.load_page(page_number)
+    scale = tile_scale(z)
+    rect = page.rect
+    size = TILE_SIZE / scale
+    clip = fitz.Rect(rect.x0 + x * size, rect.y0 + y * size, rect.x0 + (x + 1) * size, rect.y0 + (y + 1) * size) & rect
+    if clip.is_empty:
+        return None
+    pix = render_pixmap(page, scale, clip)
+    if fmt == 'png':
+        return pix.tobytes('png')
+    out = io.BytesIO()
+    pixmap_to_image(pix).save(out, 'WEBP', quality=85)
+    return out.getvalue()
+
+
+def page_text(doc, page_number):
+    page = doc.load_page(page_number)
+    return {
+        'page': page_number,
+        'width': page.rect.width,
+        'height': page.rect.height,
+        'words': [
+            {'bbox': [x0, y0, x1, y1], 'text': text, 'block': block, 'line': line}
+            for x0, y0, x1, y1, text, block, line, _ in page.get_text('words')
+        ],
+    }
+
+
+def page_links(doc, page_number):
+    links = []
+    for link in doc.load_page(page_number).get_links():
+        entry = {'bbox': list(link['from'])}
+        if link.get('uri'):
+            entry['uri'] = link['uri']
+        if link.get('page', -1) >= 0:
+            entry['page'] = link['page']
+        links.append(entry)
+    return {'page': page_number, 'links': links}
+
+
+def document_info(doc):
+    return {
+        'pages': len(doc),
+        'title': doc.metadata.get('title') or '',
+        'page_sizes': [[page.rect.width, page.rect.height] for page in doc],
+        'tile_size': TILE_SIZE,
+        'min_scale': MIN_SCALE,
+        'max_zoom': MAX_ZOOM,
+    }
+
+
+def _run(path, mtime, func, *args):
+    with _pool.lock:
+        return func(_pool.get(path, mtime), *args)
+
+
+class NotFound(Exception):
+    pass
+
+
+class TileServer:
+    """Serves page tiles, text and links of the PDFs under a folder over localhost HTTP.
+
+    Routes:
+        /docs                                   documents and their ids
+        /doc/{id}                               page count and page sizes
+        /doc/{id}/page/{n}/tile/{z}/{x}/{y}     PNG tile, or WebP with a .webp suffix
+        /doc/{id}/page/{n}/text                 words with their boxes
+        /doc/{id}/page/{n}/links                link areas and targets
+        /stats                                  cache and timing metrics
+
+    Rendering happens on worker processes so concurrent clients use every
+    core; encoded tiles are cached here and shared by all clients. Every
+    response allows cors_origin to read it; None sends no CORS header.
+    """
+
+    def __init__(self, folder, port=DEFAULT_PORT, workers=None, max_open=8, idle_seconds=300, cors_origin='*'):
+        self.folder = folder
+        self.cors_origin = cors_origin
+        self.metrics = Metrics()
+        self.cache = RenderCache(TILE_CACHE_ENTRIES, TILE_CACHE_BYTES)
+        self.lock = threading.Lock()
+        # Requests for a tile already being rendered wait for that render
+        self.inflight = {}
+        self.documents = {}
+        self.last_scan = 0.0
+        self.workers = workers or os.cpu_count() or 2
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker, initargs=(max_open, idle_seconds))
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = None
+        self.scan()
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    def scan(self):
+        self.documents = {document_id(path): path for path, _, _ in find_pdfs(self.folder)}
+        self.last_scan = time.monotonic()
+
+    def rescan(self):
+        """Pick up added and removed files, at most once every RESCAN_INTERVAL seconds."""
+        if time.monotonic() - self.last_scan > RESCAN_INTERVAL:
+            self.scan()
+
+    def resolve(self, doc_id):
+        if doc_id not in self.documents:
+            self.rescan()
+        path = self.documents.get(doc_id)
+        if path is None:
+            raise NotFound(f"Unknown document {doc_id}")
+        try:
+            return path, os.stat(path).st_mtime
+        except OSError:
+            raise NotFound(f"Document {doc_id} is no longer available")
+
+    def call(self, path, mtime, func, *args):
+        return self.executor.submit(_run, path, mtime, func, *args).result()
+
+    def tile(self, doc_id, page_number, z, x, y, fmt):
+        path, mtime = self.resolve(doc_id)
+        if not 0 <= z <= MAX_ZOOM or x < 0 or y < 0:
+            raise NotFound("Tile outside the zoom range")
+        key = (doc_id, mtime, page_number, z, x, y, fmt)
+        with self.lock:
+            data = self.cache.get(key)
+            if data is not None:
+                self.metrics.incr('tile.cache_hit')
+                return data
+            future = self.inflight.get(key)
+            if future is None:
+                future = self.executor.submit(_run, path, mtime, render_tile, page_number, z, x, y, fmt)
+                self.inflight[key] = future
+                self.metrics.incr('tile.cache_miss')
+            else:
+                self.metrics.incr('tile.shared_render')
+        try:
+            with self.metrics.timer('tile.render'):
+                data = future.result()
+        finally:
+            with self.lock:
+                self.inflight.pop(key, None)
+        if data is None:
+            raise NotFound("Tile outside the page")
+        with self.lock:
+            self.cache.put(key, data, len(data))
+        return data
+
+    def stats(self):
+        with self.lock:
+            cache = {'entries': len(self.cache), 'bytes': self.cache.bytes,
+                     'hits': self.cache.hits, 'misses': self.cache.misses}
+        return {'documents': len(self.documents), 'workers': self.workers, 'cache': cache,
+                'metrics': self.metrics.summary().splitlines()}
+
+    def handle(self, path):
+        """(status, content type, body) for a request path."""
+        parts = [p for p in urlsplit(path).path.split('/') if p]
+        if parts == ['docs']:
+            self.rescan()
+            docs = [{'id': doc_id, 'name': os.path.relpath(p, self.folder)} for doc_id, p in sorted(self.documents.items())]
+            return 200, 'application/json', docs
+        if parts == ['stats']:
+            return 200, 'application/json', self.stats()
+        if len(parts) == 2 and parts[0] == 'doc':
+            path, mtime = self.resolve(parts[1])
+            return 200, 'application/json', self.call(path, mtime, document_info)
+        if len(parts) >= 5 and parts[0] == 'doc' and parts[2] == 'page':
+            doc_id, page_number, rest = parts[1], int(parts[3]), parts[4:]
+            if page_number < 0:
+                # load_page would count negative numbers from the end
+                raise NotFound("Page out of range")
+            if rest == ['text'] or rest == ['links']:
+                path, mtime = self.resolve(doc_id)
+                return 200, 'application/json', self.call(path, mtime, page_text if rest == ['text'] else page_links, page_number)
+            if len(rest) == 4 and rest[0] == 'tile':
+                y, _, fmt = rest[3].partition('.')
+                fmt = fmt.lower() or 'png'
+                if fmt not in FORMATS:
+                    raise NotFound(f"Unsupported tile format {fmt}")
+                return 200, FORMATS[fmt], self.tile(doc_id, page_number, int(rest[1]), int(rest[2]), int(y), fmt)
+        raise NotFound("No such route")
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def send_cors_headers(self):
+                if server.cors_origin:
+                    self.send_header('Access-Control-Allow-Origin', server.cors_origin)
+                    if server.cors_origin != '*':
+                        self.send_header('Vary', 'Origin')
+
+            def do_OPTIONS(self):
+                self.send_response(204)
+                self.send_cors_headers()
+                self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
+                self.send_header('Access-Control-Max-Age', '86400')
+                self.end_headers()
+
+            def do_GET(self):
+                try:
+                    status, content_type, body = server.handle(self.path)
+                except (NotFound, ValueError) as e:
+                    status, content_type, body = 404, 'application/json', {'error': str(e)}
+                except IndexError:
+                    status, content_type, body = 404, 'application/json', {'error': "Page out of range"}
+                except Exception as e:
+                    server.metrics.incr('server.errors')
+                    status, content_type, body = 500, 'application/json', {'error': str(e)}
+                if content_type == 'application/json':
+                    body = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_cors_headers()
+                if content_type in FORMATS.values():
+                    self.send_header('Cache-Control', 'max-age=3600')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self.port
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Serve PDF page tiles to local browser clients.")
+    parser.add_argument('--serve', metavar='FOLDER', required=True, help="folder whose PDFs are served")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=None, help="render processes (default: one per core)")
+    parser.add_argument('--idle', type=int, default=300, help="seconds before an unused document is closed")
+    parser.add_argument('--cors-origin', default='*', metavar='ORIGIN',
+                        help="origin allowed to read responses from a browser (default: any; '' for none)")
+    options = parser.parse_args(args)
+
+    server = TileServer(options.serve, options.port, options.workers, idle_seconds=options.idle,
+                        cors_origin=options.cors_origin or None)
+    print(f"Serving {len(server.documents)} documents from {options.serve} on http://127.0.0.1:{server.port}/docs")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())